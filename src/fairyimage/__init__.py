@@ -1,15 +1,20 @@
 from typing import Union, List, Tuple, Optional
 from PIL import Image
-import numpy as np
 
 from figpptx.image_misc import to_image
 
+from fairyimage import cache  # NOQA
+from fairyimage import export  # NOQA
 from fairyimage.image_array import ImageArray # NOQA
-from fairyimage.editor import frame, make_logo, make_str, put, contained  # NOQA
+from fairyimage.layout import Layout, plan_layout  # NOQA
+from fairyimage.loader import size_of  # NOQA
+from fairyimage.editor import frame, make_logo, make_str, put, put_all, contained  # NOQA
 from fairyimage.editor import equalize, trim  # NOQA
-from fairyimage.color import Color  # NOQA
+from fairyimage.color import Color, ColorArray  # NOQA
 from fairyimage.operations import concatenate, vstack, hstack, resize, AlignMode  # NOQA
 from fairyimage.captioner import Captioner, captionize  # NOQA
+from fairyimage.pyramid import write_dzi  # NOQA
+from fairyimage.atlas import Atlas, make_atlas  # NOQA
 
 from fairyimage.conversion import from_source  # NOQA
 from fairyimage.conversion import from_latex  # NOQA
@@ -23,30 +28,24 @@ def thumbnail(
     shape: Tuple[int, int] = None,
     grid_color: Color = (0, 0, 0),
     grid_weight: int = 0,
+    fill: bool = False,
 ) -> Image.Image:
     """Generate thumbnail of  `images`.
 
     Args:
-        images: List of images
+        images: List of images. Paths and file objects are also accepted,
+                and they are decoded at the reduced scale if possible.
         shape: the number of rows and columns of
+        fill: If True, `shape` whose product is larger than the count is
+              accepted, and the remainder is filled with blank tiles.
 
     This function is expected to be complex in order to
     correspond to various types of arguments.
+    The layout is planned only from the sizes. (See `fairyimage.layout`.)
     """
-    image_array = ImageArray(images)
-
-    if shape is None:
-        # Determine the most appropriate `shape`.
-        (u_width, u_height) = image_array.unit_size
-        count = image_array.count
-        divisions = [n for n in range(1, count + 1) if count % n == 0]
-        # (u_width * column) is similar to (u_height * row).
-        # (row * column) is equal to `image_array.count`.
-        r_float = np.sqrt(count * u_width / u_height)
-        row = int(min(divisions, key=lambda r: abs(r - r_float)))
-        column = count // row
-        shape = (row, column)
-    image_array = image_array.reshape(shape)
+    images = list(images)
+    layout = plan_layout([size_of(image) for image in images], shape=shape, fill=fill)
+    image_array = layout.apply(images)
     image = image_array.grid(color=grid_color, width=grid_weight)
     return image
 
@@ -0,0 +1,181 @@
+"""Packing of images with different sizes into one atlas (sprite sheet).
+
+Unlike `ImageArray`, the images are not resized.
+The rectangles are planned only from the sizes by the skyline bottom-left heuristic,
+and the images are pasted once on one canvas.
+
+Example
+----------
+atlas = make_atlas({"play": play_icon, "stop": stop_icon}, padding=1)
+atlas.save("icons")  # `icons.png` and `icons.json`.
+atlas.index  # {"size": [width, height], "frames": {"play": [x, y, w, h], ...}}
+"""
+
+import json
+import math
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from fairyimage.operations import common_mode, from_array, to_mode
+
+
+class Atlas:
+    """The packed image and the rectangles of the images in it.
+
+    * `image`: the atlas.
+    * `boxes`: name -> `(left, upper, right, lower)` in `image`.
+    """
+
+    def __init__(self, image: Image.Image, boxes: Dict[str, Tuple[int, int, int, int]]):
+        self.image = image
+        self.boxes = boxes
+
+    @property
+    def index(self) -> Dict:
+        """The index of rectangles, which is serializable as `JSON`."""
+        frames = {
+            name: [left, upper, right - left, lower - upper]
+            for name, (left, upper, right, lower) in self.boxes.items()
+        }
+        return {"size": list(self.image.size), "frames": frames}
+
+    def crop(self, name: str) -> Image.Image:
+        """Return the image of `name` cut from the atlas."""
+        return self.image.crop(self.boxes[name])
+
+    def save(self, path: Union[str, Path], format: str = "png") -> Tuple[Path, Path]:
+        """Write the image as `{path}.{format}` and the index as `{path}.json`."""
+        path = Path(path)
+        image_path = path.with_suffix(f".{format}")
+        json_path = path.with_suffix(".json")
+        index = dict(self.index, image=image_path.name)
+        self.image.save(image_path)
+        json_path.write_text(json.dumps(index, indent=2), encoding="utf8")
+        return image_path, json_path
+
+
+def make_atlas(
+    images: Union[Sequence[Image.Image], Dict[str, Image.Image]],
+    width: Optional[int] = None,
+    padding: int = 0,
+) -> Atlas:
+    """Pack `images` without resizing them.
+
+    Args:
+        images: If `dict`, its keys are the names in the index,
+                otherwise the indices (`"0"`, `"1"`, ...) are used.
+        width: The width of the atlas. If `None`, the width whose area is
+               the smallest among a few candidates is selected.
+        padding: The margin between images, to avoid bleeding of filters.
+    """
+    if isinstance(images, dict):
+        names = [str(name) for name in images]
+        images = list(images.values())
+    else:
+        images = list(images)
+        names = [str(index) for index in range(len(images))]
+    if not images:
+        raise ValueError("No images are given.")
+
+    sizes = [(image.width + padding, image.height + padding) for image in images]
+    positions, size = plan_atlas(sizes, width=width + padding if width else None)
+    size = (size[0] - padding, size[1] - padding)
+
+    mode = common_mode(images)
+    canvas = _new_canvas(mode, size, images[0])
+    boxes = dict()
+    for name, image, (left, upper) in zip(names, images, positions):
+        canvas.paste(to_mode(image, mode), (left, upper))
+        boxes[name] = (left, upper, left + image.width, upper + image.height)
+    return Atlas(canvas, boxes)
+
+
+def plan_atlas(
+    sizes: Sequence[Tuple[int, int]], width: Optional[int] = None
+) -> Tuple[List[Tuple[int, int]], Tuple[int, int]]:
+    """Return the upper-left positions of the rectangles of `sizes`, and the size of the atlas.
+
+    The rectangles are placed in descending order of their heights,
+    each at the lowest position of the skyline where it fits.
+    """
+    sizes = [tuple(map(int, size)) for size in sizes]
+    if width is not None:
+        if width < max(w for (w, _) in sizes):
+            raise ValueError(f"`width`, `{width}` is smaller than the widest image.")
+        return _pack(sizes, width)
+
+    # A few widths around the square are tried.
+    area = sum(w * h for (w, h) in sizes)
+    widest = max(w for (w, _) in sizes)
+    candidates = {max(widest, round(math.sqrt(area) * ratio)) for ratio in (0.8, 1.0, 1.25, 1.6)}
+    results = [_pack(sizes, candidate) for candidate in sorted(candidates)]
+    return min(results, key=lambda result: (result[1][0] * result[1][1], result[1][0]))
+
+
+def _pack(sizes, width) -> Tuple[List[Tuple[int, int]], Tuple[int, int]]:
+    # The skyline is the list of segments, `[x, y, length]`, from left to right.
+    skyline = [[0, 0, width]]
+    positions: List[Optional[Tuple[int, int]]] = [None] * len(sizes)
+    order = sorted(range(len(sizes)), key=lambda index: (-sizes[index][1], -sizes[index][0]))
+    for index in order:
+        (w, h) = sizes[index]
+        best = None  # (top, x, segment index)
+        for i, (x, _, _) in enumerate(skyline):
+            if x + w > width:
+                break
+            y = _fit_height(skyline, i, w)
+            if best is None or (y + h, x) < (best[0], best[1]):
+                best = (y + h, x, i)
+        (top, x, i) = best
+        positions[index] = (x, top - h)
+        _raise_skyline(skyline, i, w, top)
+    used_width = max(x + w for (x, _), (w, _) in zip(positions, sizes))
+    height = max(y + h for (_, y), (_, h) in zip(positions, sizes))
+    return positions, (used_width, height)
+
+
+def _fit_height(skyline, start: int, w: int) -> int:
+    """Return the height at which the rectangle of width `w` rests from `skyline[start]`."""
+    x_end = skyline[start][0] + w
+    y = 0
+    for (x, s_y, _) in skyline[start:]:
+        if x >= x_end:
+            break
+        y = max(y, s_y)
+    return y
+
+
+def _raise_skyline(skyline, start: int, w: int, top: int):
+    x = skyline[start][0]
+    x_end = x + w
+    end = start
+    while end < len(skyline) and skyline[end][0] < x_end:
+        end += 1
+    # The last covered segment may stick out of the rectangle.
+    (l_x, l_y, l_length) = skyline[end - 1]
+    rest = [[x_end, l_y, l_x + l_length - x_end]] if l_x + l_length > x_end else []
+    skyline[start:end] = [[x, top, w]] + rest
+    # The neighbours of the same height are merged.
+    i = max(start - 1, 0)
+    while i + 1 < len(skyline) and i <= start + 1:
+        if skyline[i][1] == skyline[i + 1][1]:
+            skyline[i][2] += skyline[i + 1][2]
+            del skyline[i + 1]
+        else:
+            i += 1
+
+
+def _new_canvas(mode: str, size: Tuple[int, int], like: Image.Image) -> Image.Image:
+    if mode == "P":
+        # The palette of the images is kept, and the transparent index is used if any.
+        value = like.info.get("transparency", 0)
+        value = value if isinstance(value, int) else 0
+        return from_array(np.full((size[1], size[0]), value, dtype=np.uint8), like)
+    return Image.new(mode, size)
+
+
+if __name__ == "__main__":
+    pass
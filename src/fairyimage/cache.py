@@ -0,0 +1,312 @@
+"""Render cache shared among processes.
+
+The rendered images (`make_str`, `make_logo`, `from_latex`, `from_source`)
+are stored as `PNG` files in one folder, so that every process
+on the node (e.g. workers of `gunicorn` or `multiprocessing`)
+can read the renderings of the others.
+
+* Writing is atomic; a temporary file is written and `os.replace` is performed.
+  Hence, readers never see the broken files and no lock is required for reading.
+* Eviction is performed with respect to the age and the total size,
+  guarded by a lock file created with `O_EXCL`.
+* The cache is disabled by default.
+  Call `configure(folder)` or set the environment variable `FAIRYIMAGE_CACHE`.
+* The keys include the versions of `matplotlib`, `pygments` and `Pillow`,
+  so that the renderings of the older versions are not served after upgrades.
+
+Example
+----------
+fairyimage.cache.configure("/tmp/fairyimage", max_bytes=512 * 2 ** 20)
+image = fairyimage.make_str("Hello")  # Rendered, and stored.
+image = fairyimage.make_str("Hello")  # Read from the cache.
+print(fairyimage.cache.get_cache().stats())
+"""
+
+import functools
+import hashlib
+import inspect
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Union
+
+import matplotlib
+import pygments
+import PIL
+from PIL import Image
+
+from fairyimage.color import Color
+
+ENV_NAME = "FAIRYIMAGE_CACHE"
+
+# Incremented when the format of the stored files or keys changes.
+_VERSION = 2
+
+# The libraries which determine the pixels of the renderings.
+_LIBRARY_VERSIONS = (matplotlib.__version__, pygments.__version__, PIL.__version__)
+
+
+class RenderCache:
+    """Directory store of rendered images.
+
+    Args:
+        folder: The folder of the cache, which is created if necessary.
+        max_bytes: The upper limit of the total size of the files.
+        max_age: The files which are not accessed within `max_age` seconds are evicted.
+        evict_interval: Eviction is tried once per `evict_interval` writes.
+    """
+
+    def __init__(
+        self,
+        folder: Union[str, Path],
+        max_bytes: int = 256 * 2 ** 20,
+        max_age: float = 7 * 24 * 60 * 60,
+        evict_interval: int = 64,
+    ):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.evict_interval = evict_interval
+        self._counts = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Image.Image]:
+        """Return the image of `key`, or `None` if it is not stored."""
+        path = self._to_path(key)
+        try:
+            with Image.open(path) as image:
+                image.load()
+        except (FileNotFoundError, OSError):
+            self._count("misses")
+            return None
+        try:
+            # The access time is recorded as `mtime` for eviction.
+            os.utime(path)
+        except OSError:
+            pass
+        self._count("hits")
+        return image
+
+    def put(self, key: str, image: Image.Image):
+        """Store `image` as `key`."""
+        path = self._to_path(key)
+        path.parent.mkdir(exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=".png")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                image.save(fp, format="PNG", compress_level=1)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if self._count("writes") % self.evict_interval == 0:
+            self.evict()
+
+    def get_or_render(self, key: str, render: Callable[[], Image.Image]) -> Image.Image:
+        """Return the stored image of `key`, otherwise `render()` and store it."""
+        image = self.get(key)
+        if image is not None:
+            return image
+        image = render()
+        if isinstance(image, Image.Image):
+            self.put(key, image)
+        return image
+
+    def evict(self) -> int:
+        """Remove the old files, and return the number of removed files.
+
+        If another process is evicting, nothing is performed.
+        """
+        lock_path = self.folder / ".evict.lock"
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            # A crashed process may leave the lock.
+            if time.time() - _mtime(lock_path, default=time.time()) < 60:
+                return 0
+            _remove(lock_path)
+            return self.evict()
+        os.close(fd)
+        try:
+            n_removed = self._evict()
+        finally:
+            _remove(lock_path)
+        self._count("evictions", n_removed)
+        return n_removed
+
+    def _evict(self) -> int:
+        now = time.time()
+        entries = []
+        for path in self.folder.glob("*/*.png"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        total = sum(size for (_, size, _) in entries)
+        n_removed = 0
+        for mtime, size, path in entries:
+            if now - mtime <= self.max_age and total <= self.max_bytes:
+                break
+            if _remove(path):
+                n_removed += 1
+            total -= size
+        return n_removed
+
+    def clear(self):
+        """Remove all the stored files."""
+        for path in self.folder.glob("*/*.png"):
+            _remove(path)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the counts of this process, and the current size of the folder."""
+        with self._lock:
+            counts = dict(self._counts)
+        paths = list(self.folder.glob("*/*.png"))
+        counts["files"] = len(paths)
+        counts["bytes"] = sum(_size(path) for path in paths)
+        return counts
+
+    def _count(self, name: str, value: int = 1) -> int:
+        with self._lock:
+            self._counts[name] += value
+            return self._counts[name]
+
+    def _to_path(self, key: str) -> Path:
+        return self.folder / key[:2] / f"{key}.png"
+
+
+def make_key(name: str, /, *args, **kwargs) -> Optional[str]:
+    """Return the key of the call `name(*args, **kwargs)`.
+
+    If some arguments cannot be represented stably, `None` is returned.
+    """
+    try:
+        text = repr(
+            (_VERSION, _LIBRARY_VERSIONS, name, _normalize(args), _normalize(sorted(kwargs.items())))
+        )
+    except TypeError:
+        return None
+    return hashlib.sha256(text.encode("utf8")).hexdigest()
+
+
+def _normalize(arg):
+    if arg is None or isinstance(arg, (str, bytes, bool, int, float)):
+        return arg
+    if isinstance(arg, Color):
+        return ("Color", arg.rgba)
+    if isinstance(arg, (list, tuple)):
+        return tuple(_normalize(elem) for elem in arg)
+    if isinstance(arg, dict):
+        return tuple((_normalize(key), _normalize(value)) for key, value in sorted(arg.items()))
+    raise TypeError(f"`{type(arg)}` is not cacheable.")
+
+
+_cache: Optional[RenderCache] = None
+_configured = False
+
+
+def configure(folder: Union[str, Path, None], **kwargs) -> Optional[RenderCache]:
+    """Enable the shared cache at `folder`. If `folder` is `None`, the cache is disabled.
+
+    As for `kwargs`, refer to `RenderCache`.
+    """
+    global _cache, _configured
+    _cache = RenderCache(folder, **kwargs) if folder is not None else None
+    _configured = True
+    return _cache
+
+
+def get_cache() -> Optional[RenderCache]:
+    """Return the current `RenderCache`, or `None` if it is disabled."""
+    global _cache, _configured
+    if not _configured:
+        folder = os.environ.get(ENV_NAME)
+        _cache = RenderCache(folder) if folder else None
+        _configured = True
+    return _cache
+
+
+def cached(name: str, returns_image: Optional[Callable[[Dict], bool]] = None):
+    """Decorator so that the results of the function are shared via `get_cache()`.
+
+    The arguments are bound to the signature with the defaults,
+    so the positional and keyword forms of one call share the key.
+    The calls with a path of an existing file as `str` are not cached,
+    since the key does not reflect the content of the file.
+    `returns_image(arguments)` tells whether the call returns `PIL.Image`.
+    The other calls (e.g. `SVG` text and lists) bypass the cache without lookups.
+    The key of a call is given by `func.cache_key(*args, **kwargs)`.
+    """
+
+    def _decorator(func):
+        signature = inspect.signature(func)
+
+        def _key(*args, **kwargs) -> Optional[str]:
+            try:
+                bound = signature.bind(*args, **kwargs)
+            except TypeError:
+                return None
+            bound.apply_defaults()
+            if returns_image is not None and not returns_image(bound.arguments):
+                return None
+            if any(_is_file(value) for value in bound.arguments.values()):
+                return None
+            return make_key(name, **bound.arguments)
+
+        @functools.wraps(func)
+        def _wrapped(*args, **kwargs):
+            cache = get_cache()
+            if cache is None:
+                return func(*args, **kwargs)
+            key = _key(*args, **kwargs)
+            if key is None:
+                return func(*args, **kwargs)
+            return cache.get_or_render(key, lambda: func(*args, **kwargs))
+
+        _wrapped.cache_key = _key
+        return _wrapped
+
+    return _decorator
+
+
+def _is_file(value) -> bool:
+    # Source codes are also given as `str`, which are not regarded as paths.
+    if not isinstance(value, str) or "\n" in value or len(value) > 4096:
+        return False
+    try:
+        return os.path.isfile(value)
+    except (OSError, ValueError):
+        return False
+
+
+def _mtime(path: Path, default: float) -> float:
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return default
+
+
+def _size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def _remove(path: Path) -> bool:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    pass
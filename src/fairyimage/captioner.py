@@ -1,12 +1,29 @@
-from typing import Dict, List
+import math
+from pathlib import Path
+from typing import Dict, List, Tuple, Optional, Union
 import numpy as np
-from PIL import Image 
+from PIL import Image
 
-import fairyimage as fi
 from fairyimage import AlignMode
+from fairyimage.color import Color
+from fairyimage.editor import make_strs, put, _to_padded_size
+from fairyimage.export import PNGStreamWriter, PRESETS
+from fairyimage.layout import plan_shape
 
 class Captioner:
-    """Present images with words."""
+    """Present images with words.
+
+    All the words are rendered in one figure, the layout is computed
+    only from the sizes, and logos and images are pasted once on one canvas.
+
+    Layout
+    ---------
+    * "row": All the captioned images are placed in one row.
+    * "grid": The cells of the same size are tiled as `ImageArray`.
+              `shape` is used if given.
+    * "flow": The cells are placed from left to right,
+              and wrapped when the row exceeds `width`.
+    """
 
     def __init__(
         self,
@@ -15,36 +32,131 @@ class Captioner:
         frame_width=None,
         frame_color=None,
         align=AlignMode("center"),
+        layout="row",
+        width: Optional[int] = None,
+        shape: Optional[Tuple[int, int]] = None,
     ):
         self.fontsize = fontsize  # The fontsize of logo.
         self.backcolor = backcolor
-        self.frame_width = None
-        self.frame_color = None
+        self.frame_width = frame_width
+        self.frame_color = frame_color
         self.align = align
+        self.layout = layout
+        self.width = width  # The target width of "flow".
+        self.shape = shape  # The shape of "grid".
 
-    def __call__(self, word_to_image: Dict[str, Image.Image]):
-        # Firstly, I'd like to realize the most crude idea.
+    # The margin of logos. (See `fairyimage.make_logo`.)
+    logo_margin = 0.1
+
+    def __call__(
+        self,
+        word_to_image: Dict[str, Image.Image],
+        path: Union[str, Path, None] = None,
+        preset: str = "balanced",
+    ):
+        """Return the captioned image.
 
+        If `path` is given, the image is written to `path` as `PNG` band by band,
+        without allocating the whole image, and `path` is returned.
+        `preset` selects the compression of `PNG`. (See `fairyimage.export.PRESETS`.)
+        Since the bands are streamed, `quantize` of `preset` is ignored,
+        and "adaptive" filter is replaced with "up".
+        """
+        if preset not in PRESETS["png"]:
+            raise ValueError(f"`preset` must be one of `{list(PRESETS['png'])}`, but `{preset}`.")
         # parameters which may require modification based on `word_to_image`.
         fontsize = self.to_fontsize(self.fontsize, word_to_image)
 
-        word_to_logo = self.make_logos(word_to_image, fontsize)
-        if self.frame_width:
-            word_to_image = {word: fi.frame(image,
-                                            color=self.frame_color,
-                                            width=self.frame_width,
-                                            inner=False) for word, image in word_to_image.items()}
-        images = [
-            fi.vstack((word_to_logo[word], word_to_image[word]), align="center")
-            for word in word_to_logo
+        words = list(word_to_image)
+        strs = make_strs(words, fontsize=fontsize)
+        logo_sizes = [_to_padded_size(s.size, self.logo_margin) for s in strs]
+        image_sizes = [self._framed_size(word_to_image[word]) for word in words]
+
+        # Each cell is `vstack` of logo and image with `center`.
+        cell_sizes = [
+            (max(l_size[0], i_size[0]), l_size[1] + i_size[1])
+            for l_size, i_size in zip(logo_sizes, image_sizes)
         ]
-        return fi.hstack(images, align="start")
+        boxes, size = self._plan_cells(cell_sizes)
+
+        def _paint(canvas, indices, y_offset):
+            for index in indices:
+                (left, upper, right, _) = boxes[index]
+                upper -= y_offset
+                l_size, i_size = logo_sizes[index], image_sizes[index]
+                l_left = left + (right - left - l_size[0]) // 2
+                self._paste_logo(canvas, strs[index], (l_left, upper, l_left + l_size[0], upper + l_size[1]))
+                i_left = left + (right - left - i_size[0]) // 2
+                self._paste_image(canvas, word_to_image[words[index]], (i_left, upper + l_size[1]))
+
+        if path is None:
+            canvas = Image.new("RGBA", size=size, color=(255, 255, 255, 0))
+            _paint(canvas, range(len(words)), 0)
+            return canvas
+
+        options = PRESETS["png"][preset]
+        filter = options["filter"] if options["filter"] != "adaptive" else "up"
+        with PNGStreamWriter(
+            path, size=size, mode="RGBA", compress_level=options["compress_level"], filter=filter
+        ) as writer:
+            for (upper, lower), indices in self._to_bands(boxes, size):
+                band = Image.new("RGBA", size=(size[0], lower - upper), color=(255, 255, 255, 0))
+                _paint(band, indices, upper)
+                writer.write(band)
+        return path
+
+    def _plan_cells(self, cell_sizes) -> Tuple[List[Tuple[int, int, int, int]], Tuple[int, int]]:
+        """Return the boxes of cells and the size of the whole image."""
+        if self.layout == "row":
+            return _flow(cell_sizes, width=math.inf)
+        elif self.layout == "flow":
+            width = self.width
+            if width is None:
+                # Square-like image is the target.
+                width = math.sqrt(sum(w * h for (w, h) in cell_sizes))
+            width = max([width] + [w for (w, _) in cell_sizes])
+            return _flow(cell_sizes, width=width)
+        elif self.layout == "grid":
+            unit = (max(w for (w, _) in cell_sizes), max(h for (_, h) in cell_sizes))
+            if self.shape is None:
+                shape = plan_shape(len(cell_sizes), unit, fill=True)
+            else:
+                shape = self.shape
+            if shape[0] * shape[1] < len(cell_sizes):
+                raise ValueError(f"`shape`, `{shape}` is too small for `{len(cell_sizes)}`.")
+            boxes = []
+            for index in range(len(cell_sizes)):
+                row, column = divmod(index, shape[1])
+                left, upper = column * unit[0], row * unit[1]
+                boxes.append((left, upper, left + unit[0], upper + cell_sizes[index][1]))
+            return boxes, (unit[0] * shape[1], unit[1] * math.ceil(len(cell_sizes) / shape[1]))
+        raise ValueError("Specification of `layout` is invalid.", self.layout)
+
+    def _to_bands(self, boxes, size):
+        """Divide the image into horizontal bands, each of which contains whole cells."""
+        order = sorted(range(len(boxes)), key=lambda index: boxes[index][1])
+        bands = []
+        for index in order:
+            (_, upper, _, lower) = boxes[index]
+            if bands and upper < bands[-1][0][1]:
+                (b_upper, b_lower), indices = bands[-1]
+                bands[-1] = ((b_upper, max(b_lower, lower)), indices + [index])
+            else:
+                start = bands[-1][0][1] if bands else 0
+                bands.append(((start, lower), [index]))
+        if not bands or bands[-1][0][1] < size[1]:
+            start = bands[-1][0][1] if bands else 0
+            bands.append(((start, size[1]), []))
+        return bands
 
     def make_logos(self, word_to_image, fontsize) -> Dict[str, Image.Image]:
+        words = list(word_to_image)
+        strs = make_strs(words, fontsize=fontsize)
         word_to_logo = dict()
-        for word, _ in word_to_image.items():
-            logo = fi.make_logo(word, fontsize=fontsize, backcolor=self.backcolor)
-            word_to_logo[word] = logo
+        for word, s in zip(words, strs):
+            size = _to_padded_size(s.size, self.logo_margin)
+            background = Image.new("RGBA", size=size, color=self._backcolor().rgba)
+            word_to_logo[word] = put(s, background)
         return word_to_logo
 
     def to_fontsize(self, fontsize, word_to_image):
@@ -57,8 +169,57 @@ class Captioner:
             return round(np.mean(heights + widths) * 0.15)
         raise ValueError("Specification of `fontsize` is invalid.", fontsize)
 
+    def _backcolor(self) -> Color:
+        if self.backcolor is None:
+            return Color((0, 0, 0, 0))
+        return Color(self.backcolor)
+
+    def _framed_size(self, image) -> Tuple[int, int]:
+        width = self.frame_width or 0
+        return (image.size[0] + 2 * width, image.size[1] + 2 * width)
+
+    def _paste_logo(self, canvas, s, box):
+        """Equivalent to pasting `make_logo` whose region is `box`."""
+        canvas.paste(self._backcolor().rgba, box)
+        offset = ((box[2] - box[0] - s.size[0]) // 2, (box[3] - box[1] - s.size[1]) // 2)
+        canvas.paste(s, (box[0] + offset[0], box[1] + offset[1]), mask=s)
+
+    def _paste_image(self, canvas, image, position):
+        """Equivalent to pasting `frame(image)` at `position`."""
+        if image.mode != "RGBA":
+            image = image.convert("RGBA")
+        width = self.frame_width or 0
+        if width:
+            color = Color(self.frame_color if self.frame_color is not None else (0, 0, 0))
+            size = self._framed_size(image)
+            canvas.paste(color.rgba, (*position, position[0] + size[0], position[1] + size[1]))
+        canvas.paste(image, (position[0] + width, position[1] + width))
+
+
+def _flow(cell_sizes, width) -> Tuple[List[Tuple[int, int, int, int]], Tuple[int, int]]:
+    """Place cells from left to right, wrapping at `width`, aligned at the top."""
+    boxes = []
+    x, y, row_height, total_width = 0, 0, 0, 0
+    for (w, h) in cell_sizes:
+        if x and width < x + w:
+            x, y, row_height = 0, y + row_height, 0
+        boxes.append((x, y, x + w, y + h))
+        x += w
+        row_height = max(row_height, h)
+        total_width = max(total_width, x)
+    return boxes, (total_width, y + row_height)
 
-def captionize(word_to_image: Dict[str, Image.Image], align=AlignMode("center")):
-    captioner = Captioner(align=align)
-    return captioner(word_to_image)
 
+def captionize(
+    word_to_image: Dict[str, Image.Image],
+    align=AlignMode("center"),
+    layout="row",
+    width: Optional[int] = None,
+    shape: Optional[Tuple[int, int]] = None,
+    path: Union[str, Path, None] = None,
+):
+    """Return the image of `word_to_image` with captions.
+    As for `layout`, `width`, `shape` and `path`, refer to `Captioner`.
+    """
+    captioner = Captioner(align=align, layout=layout, width=width, shape=shape)
+    return captioner(word_to_image, path=path)
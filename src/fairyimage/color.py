@@ -9,34 +9,67 @@ Internally, ``alpha`` is kept in [0, 1] and RGB are kept in [0, 255].
 """
 
 
+from collections import OrderedDict
 from collections.abc import Sequence
 import json
 
+import numpy as np
+
 
 class Color:
-    def __init__(self, arg):
-        if isinstance(arg, str):
-            if arg.startswith("#"):
-                color_tuple = _hex_to_color(arg)
-            else:
-                raise NotImplementedError
-        elif isinstance(arg, int):
-            color_tuple = _int_to_color(arg)
-        elif isinstance(arg, Sequence):
-            color_tuple = arg
-        elif isinstance(arg, Color):
-            color_tuple = arg._rgb + (arg._alpha,)
+    """Immutable and hashable color.
 
-        else:
-            raise ValueError(f"Cannot dechipher `{arg}` ")
+    Since `Color` is immutable, the instances for the same arguments are interned.
+    Hence, `Color(arg)` for the frequently used `arg` costs only a lookup.
+    The interned instances are kept up to `_cache_limit`, in LRU order.
+
+    `Color` is equal to the values which denote the same color, such as `(255, 0, 0)`
+    or `"#FF0000"`. They are looked up among the interned instances, so that
+    comparisons do not parse the same value again.
+    """
+
+    __slots__ = ("_rgb", "_alpha", "_rgba")
 
+    _cache = OrderedDict()  # Key of `arg` -> `Color`.
+    _cache_limit = 4096
+
+    def __new__(cls, arg):
+        if isinstance(arg, Color):
+            return arg
+        key = _to_key(arg)
+        if key is not None:
+            cached = cls._cache.get(key)
+            if cached is not None:
+                try:
+                    cls._cache.move_to_end(key)
+                except KeyError:  # Evicted by another thread.
+                    pass
+                return cached
+
+        color_tuple = _to_color_tuple(arg)
         if len(color_tuple) == 3:
-            self._rgb, self._alpha = _normalize(color_tuple, 1.0)
+            rgb, alpha = _normalize(color_tuple, 1.0)
         elif len(color_tuple) == 4:
-            self._rgb, self._alpha = _normalize(color_tuple[:3], color_tuple[3])
+            rgb, alpha = _normalize(color_tuple[:3], color_tuple[3])
         else:
             raise ValueError(f"Cannot handle, `{color_tuple}`")
 
+        self = _restore(cls, tuple(rgb), alpha)
+        if key is not None:
+            cls._cache[key] = self
+            while len(cls._cache) > cls._cache_limit:
+                try:
+                    cls._cache.popitem(last=False)
+                except KeyError:
+                    break
+        return self
+
+    def __setattr__(self, key, value):
+        raise AttributeError("`Color` is immutable.")
+
+    def __reduce__(self):
+        return (_restore, (Color, self._rgb, self._alpha))
+
     @property
     def rgb(self):
         """3-length tuple.
@@ -49,7 +82,7 @@ class Color:
         """4-length tuple.
         Range of channel values is [0, 255].
         """
-        return self._rgb + (round(self._alpha * 255),)
+        return self._rgba
 
     @property
     def alpha(self):
@@ -70,7 +103,15 @@ class Color:
         return code.upper()
 
     def __eq__(self, other):
-        return self.rgba == Color(other).rgba
+        if not isinstance(other, Color):
+            try:
+                other = Color(other)
+            except (ValueError, TypeError):
+                return NotImplemented
+        return self._rgba == other._rgba
+
+    def __hash__(self):
+        return hash(self._rgba)
 
     def __str__(self):
         if self.alpha == 1:
@@ -78,6 +119,50 @@ class Color:
         else:
             return f"Color({self.rgba})"
 
+    def __repr__(self):
+        return f"Color({self.rgba})"
+
+
+class ColorArray:
+    """Multiple colors as `(N, 4)` `np.uint8` array.
+
+    The arguments are parsed at once for each type,
+    (hex `str`, `int`, `Sequence` and `Color`), following to the rules of `Color`.
+    """
+
+    def __init__(self, colors):
+        if isinstance(colors, ColorArray):
+            self._array = colors.array.copy()
+        else:
+            self._array = _to_rgba_array(list(colors))
+
+    @property
+    def array(self) -> np.ndarray:
+        """`(N, 4)` array. Range of channel values is [0, 255]."""
+        return self._array
+
+    @property
+    def rgb(self) -> np.ndarray:
+        return self._array[:, :3]
+
+    @property
+    def alpha(self) -> np.ndarray:
+        """Range is [0, 1]."""
+        return self._array[:, 3] / 255
+
+    def __len__(self):
+        return len(self._array)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return Color(tuple(int(v) for v in self._array[index]))
+        ret = ColorArray([])
+        ret._array = self._array[index]
+        return ret
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
 
 def _normalize(color_tuple, alpha):
     """Normalize the range of values."""
@@ -89,11 +174,44 @@ def _normalize(color_tuple, alpha):
     return color_tuple, alpha
 
 
+def _restore(cls, rgb, alpha):
+    """Construct `Color` from the normalized values."""
+    self = object.__new__(cls)
+    object.__setattr__(self, "_rgb", rgb)
+    object.__setattr__(self, "_alpha", alpha)
+    object.__setattr__(self, "_rgba", rgb + (round(alpha * 255),))
+    return self
+
+
+def _to_key(arg):
+    """Return the hashable key of `arg` for interning, or `None`."""
+    if isinstance(arg, str):
+        return arg.upper()
+    elif isinstance(arg, int):
+        return ("int", arg)
+    elif isinstance(arg, tuple):
+        if all(isinstance(elem, (int, float)) for elem in arg):
+            return arg
+    return None
+
+
+def _to_color_tuple(arg):
+    if isinstance(arg, str):
+        if arg.startswith("#"):
+            return _hex_to_color(arg)
+        else:
+            raise NotImplementedError
+    elif isinstance(arg, int):
+        return _int_to_color(arg)
+    elif isinstance(arg, Sequence):
+        return arg
+    raise ValueError(f"Cannot dechipher `{arg}` ")
+
+
 def _hex_to_color(color_str):
     color_str = color_str.strip("#")
     assert len(color_str) in {6, 8}, "Invaid Hex Color Code"
-    strings = map(lambda pair: "".join(pair), zip(*[iter(color_str)] * 2))
-    return tuple(map(lambda s: int(s, 16), strings))
+    return tuple(bytes.fromhex(color_str))
 
 
 def _int_to_color(color_int):
@@ -101,5 +219,51 @@ def _int_to_color(color_int):
     return rgb_tuple
 
 
+def _to_rgba_array(colors) -> np.ndarray:
+    """Convert `colors` into `(N, 4)` array of `np.uint8`."""
+    result = np.empty((len(colors), 4), dtype=np.uint8)
+    kinds = dict()
+    for index, color in enumerate(colors):
+        if isinstance(color, str) and color.startswith("#"):
+            kind = ("hex", len(color.strip("#")))
+        elif isinstance(color, (int, np.integer)):
+            kind = "int"
+        elif isinstance(color, (Sequence, np.ndarray)) and len(color) in {3, 4}:
+            kind = ("seq", len(color))
+        else:
+            kind = "other"
+        kinds.setdefault(kind, []).append(index)
+
+    for kind, indices in kinds.items():
+        if kind == "other" or kind[0] == "hex" and kind[1] not in {6, 8}:
+            result[indices] = [Color(colors[index]).rgba for index in indices]
+        elif kind[0] == "hex":
+            joined = "".join(colors[index].strip("#") for index in indices)
+            values = np.frombuffer(bytes.fromhex(joined), dtype=np.uint8)
+            values = values.reshape(len(indices), kind[1] // 2)
+            result[indices, : values.shape[1]] = values
+            if values.shape[1] == 3:
+                result[indices, 3] = 255
+        elif kind == "int":
+            values = np.array([colors[index] for index in indices], dtype=np.int64)
+            for channel in range(3):
+                result[indices, channel] = (values >> (8 * channel)) & 255
+            result[indices, 3] = 255
+        else:
+            values = np.array([colors[index] for index in indices], dtype=np.float64)
+            rgb = values[:, :3]
+            # Following to `_normalize`, all-[0, 1] colors are regarded as floats.
+            is_floats = np.all((0 <= rgb) & (rgb <= 1), axis=1)
+            rgb = np.where(is_floats[:, None], np.trunc(rgb * 255), rgb)
+            result[indices, :3] = rgb.astype(np.uint8)
+            if values.shape[1] == 4:
+                alpha = values[:, 3]
+                alpha = np.where(1 < alpha, alpha / 255, alpha)
+                result[indices, 3] = np.round(alpha * 255).astype(np.uint8)
+            else:
+                result[indices, 3] = 255
+    return result
+
+
 if __name__ == "__main__":
     pass
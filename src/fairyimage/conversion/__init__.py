@@ -7,13 +7,26 @@ from matplotlib.figure import Figure
 from matplotlib.axes import Axes
 
 from figpptx import image_misc   # NOQA
+from fairyimage import rendering  # NOQA
+from fairyimage.cache import cached  # NOQA
 from fairyimage.conversion import source  # NOQA
 from fairyimage.conversion.source import PygmentsCaller  # NOQA
 from fairyimage.conversion.latex import via_matplotlib   # NOQA
 from fairyimage.conversion.latex import via_pdf   # NOQA
+from fairyimage.conversion.latex import via_mathtext   # NOQA
+from fairyimage.conversion import latex as latex_  # NOQA
+from fairyimage.conversion import aio  # NOQA
+from fairyimage.conversion.incremental import IncrementalRenderer  # NOQA
+from fairyimage.conversion import svg  # NOQA
 
 
 
+def _is_single_image(arguments) -> bool:
+    # `vector` and `n_image` > 1 return `SVG` text and lists, which are not stored.
+    return not arguments["vector"] and arguments["n_image"] == 1
+
+
+@cached("from_source", returns_image=_is_single_image)
 def from_source(
     source,
     fontname=None,
@@ -22,6 +35,7 @@ def from_source(
     style="friendly",
     n_image=1,
     break_criterion=None,
+    vector=False,
     **options
 ):
     """Convert source code (typically intended for `Python` ) to `PIL.Image.Image`.
@@ -29,11 +43,17 @@ def from_source(
     As for `lexer`, `style`, `fontname`, `fontsize`, refer to `pygments`.
     Notice that if you set `n_image` is more than 1,
     the return becomes `List`.
+    If `vector` is True, the return is `SVG` text with the same layout,
+    which `svg.rasterize` converts to an image at any scale.
     """
 
     caller = PygmentsCaller(
         style=style, lexer=lexer, fontname=fontname, fontsize=fontsize, **options
     )
+    if vector:
+        if n_image != 1:
+            raise ValueError("`vector` output does not support `n_image` more than 1.")
+        return caller.to_svg(source)
     if n_image == 1:
         return caller.to_image(source)
     else:
@@ -41,25 +61,46 @@ def from_source(
 
 
 def from_figure(figure, **kwargs):
-    """Convert  `matplotlib.figure.Figure` to `PIL.Image.Image`."""
+    """Convert  `matplotlib.figure.Figure` to `PIL.Image.Image`.
+
+    For `Agg` based canvas, the buffer is used directly without `PNG` round trip.
+    """
+    if _is_fast(figure, kwargs):
+        return rendering.figure_to_image(figure, **kwargs)
     return image_misc.fig_to_image(figure, **kwargs)
 
 
 def from_axes(axes, **kwargs):
     """Convert  `matplotlib.figure.Figure` to `PIL.Image.Image`."""
     is_tight = kwargs.pop("is_tight", True)
+    if _is_fast(axes.figure, kwargs):
+        return rendering.axes_to_image(axes, is_tight, **kwargs)
     return image_misc.ax_to_image(axes, is_tight, **kwargs)
 
 
 def from_artists(axes, **kwargs):
     """Convert  `matplotlib.artist.Artists` to `PIL.Image.Image`."""
     is_tight = kwargs.pop("is_tight", True)
+    artists = [axes] if isinstance(axes, Artist) else list(axes)
+    if _is_fast(artists[0].figure, kwargs):
+        return rendering.artists_to_image(artists, is_tight, **kwargs)
     return image_misc.artists_to_image(axes, is_tight, **kwargs)
 
 
-def from_latex(latex, **kwargs):
-    # return via_matplotlib(latex, **kwargs)
-    return via_pdf(latex, **kwargs)
+def _is_fast(figure, kwargs) -> bool:
+    """Whether the fast path of `fairyimage.rendering` is applicable."""
+    return rendering.is_rasterizable(figure.figure) and set(kwargs) <= {"dpi"}
+
+
+@cached("from_latex")
+def from_latex(latex, method: str = "pdf", **kwargs):
+    """Convert `latex` to an image.
+
+    `method` is one of "pdf" (default), "mathtext" and "auto".
+    With "auto", a simple formula such as `$\\frac{1}{2}$` is rendered by
+    `via_mathtext` in-process, and the others are compiled by `via_pdf`.
+    """
+    return latex_.from_latex(latex, method=method, **kwargs)
 
 if __name__ == "__main__":
     pass
@@ -0,0 +1,202 @@
+"""`asyncio` version of conversion functions.
+
+The blocking conversions are run in the managed executor,
+and `lualatex` is run via `asyncio.create_subprocess_exec`,
+so that one event loop can serve many conversions.
+
+Example
+----------
+image = await aio.from_latex(r"$\frac{1}{2}$", method="auto")
+
+async with AsyncConverter(max_workers=4) as converter:
+    images = await asyncio.gather(*(converter.from_source(s) for s in sources))
+
+Note
+------
+* `matplotlib.pyplot` is not thread-safe, so the renderings of given figures
+  (`from_figure`, `from_axes`) are serialized.
+  `make_str` uses the thread-local figure pool, so it runs in parallel.
+* When an awaiting call is cancelled, `lualatex` is killed.
+  As for the jobs in the executor, their results are discarded,
+  since running threads cannot be interrupted.
+  The compiled PDF is read into memory before the jobs, so they do not
+  depend on the temporary folder.
+* The limit of `lualatex` processes is kept for each event loop,
+  so the same converter can be used from successive `asyncio.run`.
+"""
+
+import asyncio
+import functools
+import tempfile
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image
+
+from fairyimage.color import Color
+from fairyimage.conversion import latex
+
+
+class AsyncConverter:
+    """Run the conversions of `fairyimage` on an event loop.
+
+    Args:
+        max_workers: the number of threads for CPU-bound renderings.
+        max_tex_jobs: the number of `lualatex` processes running at the same time.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_tex_jobs: int = 2):
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="fairyimage")
+        self._max_tex_jobs = max_tex_jobs
+        self._tex_semaphores = weakref.WeakKeyDictionary()  # Event loop -> `asyncio.Semaphore`.
+        self._pyplot_lock = threading.Lock()
+        self._shared = False
+
+    async def from_source(self, source, **kwargs) -> Image.Image:
+        """Refer to `fairyimage.conversion.from_source`."""
+        from fairyimage.conversion import from_source
+
+        return await self._run(from_source, source, **kwargs)
+
+    async def from_figure(self, figure, **kwargs) -> Image.Image:
+        """Refer to `fairyimage.conversion.from_figure`."""
+        from fairyimage.conversion import from_figure
+
+        return await self._run(from_figure, figure, pyplot=True, **kwargs)
+
+    async def from_axes(self, axes, **kwargs) -> Image.Image:
+        """Refer to `fairyimage.conversion.from_axes`."""
+        from fairyimage.conversion import from_axes
+
+        return await self._run(from_axes, axes, pyplot=True, **kwargs)
+
+    async def make_str(self, s: str, **kwargs) -> Image.Image:
+        """Refer to `fairyimage.make_str`."""
+        from fairyimage.editor import make_str
+
+        return await self._run(make_str, s, **kwargs)
+
+    async def from_latex(self, text, method: str = "pdf", **kwargs) -> Image.Image:
+        """Refer to `fairyimage.conversion.from_latex`."""
+        if method not in {"auto", "mathtext", "pdf"}:
+            raise ValueError(f"`method` must be one of `auto`, `mathtext` and `pdf`, but `{method}`.")
+        if method == "mathtext" or (method == "auto" and latex.is_formula(text)):
+            try:
+                return await self._run(latex.via_mathtext, text, **kwargs)
+            except ValueError:
+                if method == "mathtext":
+                    raise
+        return await self.via_pdf(text, **kwargs)
+
+    async def via_pdf(
+        self,
+        text,
+        fontsize: int = 24,
+        color: Color = None,
+        target_dpi: int = 96,
+        transparent: bool = True,
+    ) -> Image.Image:
+        """Refer to `fairyimage.conversion.latex.via_pdf`."""
+        async with self._tex_semaphore():
+            with tempfile.TemporaryDirectory() as folder:
+                path = Path(folder) / "__latex__.tex"
+                path.write_text(latex.gen_source(text, color), encoding="utf8")
+                await _run_lualatex(path)
+                pdf = path.with_suffix(".pdf").read_bytes()
+        return await self._run(
+            latex.pdf_to_image,
+            pdf,
+            fontsize=fontsize,
+            target_dpi=target_dpi,
+            transparent=transparent,
+        )
+
+    def _tex_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._tex_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._max_tex_jobs)
+            self._tex_semaphores[loop] = semaphore
+        return semaphore
+
+    async def _run(self, func, *args, pyplot: bool = False, **kwargs):
+        call = functools.partial(func, *args, **kwargs)
+        if pyplot:
+            call = functools.partial(_locked, self._pyplot_lock, call)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, call)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        # The default instance is shared by the module-level functions.
+        if not self._shared:
+            self.shutdown(wait=False)
+
+
+def _locked(lock, call):
+    with lock:
+        return call()
+
+
+async def _run_lualatex(path: Path):
+    process = await asyncio.create_subprocess_exec(
+        "lualatex",
+        "-interaction=nonstopmode",
+        path.name,
+        cwd=path.parent,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+    )
+    try:
+        await process.communicate()
+    except asyncio.CancelledError:
+        process.kill()
+        await process.wait()
+        raise
+    if process.returncode != 0:
+        raise ValueError("Failed to compile the latex.")
+
+
+_default_converter: Optional[AsyncConverter] = None
+
+
+def get_converter() -> AsyncConverter:
+    """Return `AsyncConverter` used by the module-level functions."""
+    global _default_converter
+    if _default_converter is None:
+        _default_converter = AsyncConverter()
+        _default_converter._shared = True
+    return _default_converter
+
+
+async def from_source(source, **kwargs) -> Image.Image:
+    return await get_converter().from_source(source, **kwargs)
+
+
+async def from_figure(figure, **kwargs) -> Image.Image:
+    return await get_converter().from_figure(figure, **kwargs)
+
+
+async def from_axes(axes, **kwargs) -> Image.Image:
+    return await get_converter().from_axes(axes, **kwargs)
+
+
+async def from_latex(text, **kwargs) -> Image.Image:
+    return await get_converter().from_latex(text, **kwargs)
+
+
+async def make_str(s: str, **kwargs) -> Image.Image:
+    return await get_converter().make_str(s, **kwargs)
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,434 @@
+"""Incremental rendering of source code, for live previews.
+
+`from_source` lexes and renders the whole source for every call.
+`IncrementalRenderer` keeps the previous result, and for a new source,
+
+* only the lines from the first changed line are lexed again,
+  until the state of the lexer converges to the previous one,
+* only the strips of the lines whose tokens are changed are rendered,
+* and the strips are pasted on the kept canvas.
+  (The canvas is re-created only when its size changes.)
+
+Example
+----------
+renderer = IncrementalRenderer(lexer="Python", style="friendly")
+image = renderer.update(source)
+image = renderer.update(edited_source)  # Only the edited lines are rendered.
+renderer.pop_dirty()  # The repainted boxes.
+
+Note
+-------
+* The lexers of `pygments.lexer.RegexLexer`, whose rules inspect bounded number of lines,
+  are lexed incrementally. (See `line_reach`.)
+  For the others, such as `PythonLexer` whose docstring rule scans to the closing quotes,
+  the whole source is lexed, but only the changed lines are rendered.
+* `hl_lines` of the formatter is not supported.
+"""
+
+import math
+import re
+from re import _constants, _parser
+from typing import List, Optional, Sequence, Tuple
+
+from PIL import Image, ImageDraw
+from pygments.lexer import Lexer, RegexLexer
+from pygments.lexers import find_lexer_class
+from pygments.token import Error, Whitespace, _TokenType
+
+from fairyimage.conversion import pygments_ext
+
+LineTokens = Tuple[Tuple[_TokenType, str], ...]
+State = Optional[Tuple[str, ...]]
+
+
+class IncrementalRenderer:
+    """Render the versions of one source incrementally.
+
+    Args:
+        lexer: The name of lexer or `pygments.lexer.Lexer`.
+        formatter: `pygments.formatters.img.ImageFormatter`.
+                   If `None`, `pygments_ext.ImageFormatter(fontname, fontsize, **options)`.
+    """
+
+    def __init__(self, lexer="Python", fontname=None, fontsize=None, formatter=None, **options):
+        if isinstance(lexer, str):
+            lexer_cls = find_lexer_class(lexer)
+            if not lexer_cls:
+                raise ValueError(f"Cannot find `{lexer}` Lexer.")
+            lexer = lexer_cls()
+        if not isinstance(lexer, Lexer):
+            raise ValueError(f"`lexer` must be the name or `Lexer`, but `{lexer}`.")
+        if formatter is None:
+            formatter = pygments_ext.ImageFormatter(fontname=fontname, fontsize=fontsize, **options)
+        self.lexer = lexer
+        self.formatter = formatter
+
+        self._lines: List[str] = []
+        self._tokens: List[LineTokens] = []
+        self._states: List[State] = []  # The state stack at the start of each line.
+        self._strips: List[Image.Image] = []
+        self._widths: List[int] = []
+        self._canvas: Optional[Image.Image] = None
+        self._painted: List[Optional[Image.Image]] = []  # The strips `_canvas` reflects.
+        self._dirty: List[Tuple[int, int, int, int]] = []
+
+    @property
+    def image(self) -> Optional[Image.Image]:
+        """The current image. It is updated in-place, so copy it before modifying it."""
+        return self._canvas
+
+    @property
+    def dirty_boxes(self) -> List[Tuple[int, int, int, int]]:
+        """Boxes of `image` repainted since the last `pop_dirty`."""
+        return list(self._dirty)
+
+    def pop_dirty(self) -> List[Tuple[int, int, int, int]]:
+        """Return `dirty_boxes` and clear them."""
+        boxes, self._dirty = self._dirty, []
+        return boxes
+
+    def update(self, source: str) -> Image.Image:
+        """Render `source`, reusing the previous result, and return the image."""
+        text = self._preprocess(source)
+        lines = text.splitlines(True)
+        old_lines = self._lines
+        n_prefix = _common_prefix(old_lines, lines)
+        n_suffix = _common_suffix(old_lines, lines, n_prefix)
+
+        if self._can_resume():
+            start, tokens, states = self._relex(lines, n_prefix, n_suffix)
+        else:
+            start, tokens, states = 0, _split_lines(self.lexer.get_tokens(text), len(lines)), [None] * len(lines)
+
+        # The line `i` (>= `start`) corresponds to the old line `_aligned(i)`, if any.
+        delta = len(lines) - len(old_lines)
+
+        def _aligned(i):
+            if i < n_prefix:
+                return i
+            if i >= len(lines) - n_suffix:
+                return i - delta
+            return None
+
+        strips = list(self._strips[:start])
+        widths = list(self._widths[:start])
+        for i in range(start, len(lines)):
+            k = _aligned(i)
+            if k is not None and k < len(self._tokens) and self._tokens[k] == tokens[i]:
+                strips.append(self._strips[k])
+                widths.append(self._widths[k])
+            else:
+                strip, width = self._render_line(tokens[i])
+                strips.append(strip)
+                widths.append(width)
+
+        self._lines, self._tokens, self._states = lines, tokens, states
+        self._strips, self._widths = strips, widths
+        self._paint()
+        return self._canvas
+
+    def _preprocess(self, source: str) -> str:
+        # Newlines, tabs and strips are normalized as `Lexer.get_tokens` does.
+        if hasattr(self.lexer, "_preprocess_lexer_input"):
+            return self.lexer._preprocess_lexer_input(source)
+        text = source.replace("\r\n", "\n").replace("\r", "\n")
+        return text if text.endswith("\n") else text + "\n"
+
+    def _can_resume(self) -> bool:
+        """Whether lexing can be resumed from the middle with the state stack."""
+        lexer = self.lexer
+        return (
+            isinstance(lexer, RegexLexer)
+            and type(lexer).get_tokens_unprocessed is RegexLexer.get_tokens_unprocessed
+            and not lexer.filters
+            and line_reach(lexer) < math.inf
+        )
+
+    def _relex(self, lines: Sequence[str], n_prefix: int, n_suffix: int):
+        """Lex `lines` from a safe line before the change,
+        until the state converges to the previous one at the unchanged lines.
+
+        A match which starts at a line may inspect the following `line_reach(lexer)` lines,
+        so lexing is restarted at the line whose state is known, and which is
+        at least `line_reach(lexer)` lines before the first changed line.
+
+        Return the first lexed line, the tokens and the states of all the lines.
+        """
+        old_tokens, old_states = self._tokens, self._states
+        start = max(0, min(n_prefix - line_reach(self.lexer), len(old_states) - 1))
+        while start > 0 and old_states[start] is None:
+            start -= 1
+        stack = old_states[start] if old_states else ("root",)
+
+        tokens = old_tokens[:start]
+        states = old_states[:start] + [stack]
+        delta = len(lines) - len(self._lines)
+        suffix_start = len(lines) - n_suffix
+        text = "".join(lines[start:])
+
+        current: List[Tuple[_TokenType, str]] = []
+        for match_tokens, stack in _lex_resumable(self.lexer, text, stack):
+            pieces = [(ttype, piece) for ttype, value in match_tokens for piece in value.splitlines(True)]
+            for index, (ttype, piece) in enumerate(pieces):
+                current.append((ttype, piece))
+                if not piece.endswith("\n"):
+                    continue
+                tokens.append(tuple(current))
+                current = []
+                # The state is known only at the end of the match.
+                states.append(stack if index == len(pieces) - 1 else None)
+                line = len(tokens)
+                k = line - delta
+                # Converged when an unchanged line is lexed as before, and the states are equal.
+                if line - 1 >= suffix_start and line < len(lines) and 1 <= k < len(old_states):
+                    if (
+                        states[line] is not None
+                        and states[line] == old_states[k]
+                        and tokens[line - 1] == old_tokens[k - 1]
+                    ):
+                        return start, tokens + old_tokens[k:], states[:line] + old_states[k:]
+        if current:
+            tokens.append(tuple(current))
+        return start, tokens[: len(lines)], states[: len(lines)]
+
+    def _render_line(self, tokens: LineTokens) -> Tuple[Image.Image, int]:
+        """Return the strip of the text of one line, and the width of the text."""
+        f = self.formatter
+        f.drawables = []
+        f._create_drawables(tokens)
+        width = f.maxlinelength
+        x0, y0 = f._get_text_pos(0, 0)
+        # The margin is for the overhang of italic fonts.
+        strip = Image.new("RGB", (width + f.fontw, f._get_line_height()), f.background_color)
+        draw = ImageDraw.Draw(strip)
+        for (x, y), value, font, text_fg, text_bg in f.drawables:
+            pos = (x - x0, y - y0)
+            if text_bg:
+                text_size = font.getbbox(value)[2:]
+                draw.rectangle([pos[0], pos[1], pos[0] + text_size[0], pos[1] + text_size[1]], fill=text_bg)
+            draw.text(pos, value, font=font, fill=text_fg)
+        return strip, width
+
+    def _paint(self):
+        f = self.formatter
+        size = f._get_image_size(max(self._widths, default=0), len(self._lines))
+        x0 = f._get_char_x(0)
+        if self._canvas is None or self._canvas.size != size:
+            self._canvas = Image.new("RGB", size, f.background_color)
+            f._paint_line_number_bg(self._canvas)
+            self._draw_line_numbers(range(len(self._lines)))
+            self._painted = [None] * len(self._lines)
+            self._dirty = [(0, 0, *size)]
+        for row, strip in enumerate(self._strips):
+            if self._painted[row] is strip:
+                continue
+            y = f._get_line_y(row)
+            box = (x0, y, size[0], y + f._get_line_height())
+            self._canvas.paste(f.background_color, box)
+            width = min(strip.width, box[2] - box[0])
+            self._canvas.paste(strip.crop((0, 0, width, strip.height)), box[:2])
+            self._painted[row] = strip
+            self._dirty.append(box)
+
+    def _draw_line_numbers(self, rows):
+        f = self.formatter
+        if not f.line_numbers:
+            return
+        draw = ImageDraw.Draw(self._canvas)
+        font = f.fonts.get_font(f.line_number_bold, f.line_number_italic)
+        for row in rows:
+            number = row + f.line_number_start
+            if number % f.line_number_step == 0:
+                text = str(number).rjust(f.line_number_chars)
+                draw.text(f._get_linenumber_pos(row), text, font=font, fill=f.line_number_fg)
+
+
+def _lex_resumable(lexer: RegexLexer, text: str, stack: Tuple[str, ...]):
+    """Equivalent to `RegexLexer.get_tokens_unprocessed(text, stack)`,
+    but yield the tokens of each match together with the state stack after it.
+    """
+    pos = 0
+    tokendefs = lexer._tokens
+    statestack = list(stack)
+    statetokens = tokendefs[statestack[-1]]
+    while True:
+        for rexmatch, action, new_state in statetokens:
+            m = rexmatch(text, pos)
+            if not m:
+                continue
+            if action is None:
+                tokens = []
+            elif type(action) is _TokenType:
+                tokens = [(action, m.group())]
+            else:
+                tokens = [(ttype, value) for (_, ttype, value) in action(lexer, m)]
+            pos = m.end()
+            if new_state is not None:
+                if isinstance(new_state, tuple):
+                    for state in new_state:
+                        if state == "#pop":
+                            if len(statestack) > 1:
+                                statestack.pop()
+                        elif state == "#push":
+                            statestack.append(statestack[-1])
+                        else:
+                            statestack.append(state)
+                elif isinstance(new_state, int):
+                    if abs(new_state) >= len(statestack):
+                        del statestack[1:]
+                    else:
+                        del statestack[new_state:]
+                elif new_state == "#push":
+                    statestack.append(statestack[-1])
+                statetokens = tokendefs[statestack[-1]]
+            yield tokens, tuple(statestack)
+            break
+        else:
+            if pos >= len(text):
+                break
+            if text[pos] == "\n":
+                statestack = ["root"]
+                statetokens = tokendefs["root"]
+                yield [(Whitespace, "\n")], ("root",)
+            else:
+                yield [(Error, text[pos])], tuple(statestack)
+            pos += 1
+
+
+def line_reach(lexer: RegexLexer) -> float:
+    """Return the upper bound of the newlines which one match of `lexer` may inspect.
+
+    The rules such as `\"\"\"(?:.|\\n)*?\"\"\"` scan the lines unboundedly,
+    and in that case, `math.inf` is returned.
+    """
+    tokendefs = getattr(lexer, "_tokens", None)
+    if not tokendefs:
+        return math.inf
+    # `tokendefs` is kept in the value, so that its `id` is not reused.
+    cached = _reaches.get(id(tokendefs))
+    if cached is not None and cached[0] is tokendefs:
+        return cached[1]
+    reach = 0
+    for rules in tokendefs.values():
+        for rexmatch, _, _ in rules:
+            regex = getattr(rexmatch, "__self__", None)
+            try:
+                parsed = _parser.parse(regex.pattern, regex.flags)
+            except Exception:
+                reach = math.inf
+                break
+            reach = max(reach, _newline_reach(parsed, regex.flags))
+    _reaches[id(tokendefs)] = (tokendefs, reach)
+    return reach
+
+
+_reaches = dict()
+
+
+# The categories of `re` which include "\n".
+_NEWLINE_CATEGORIES = {
+    _constants.CATEGORY_SPACE,
+    _constants.CATEGORY_NOT_DIGIT,
+    _constants.CATEGORY_NOT_WORD,
+    _constants.CATEGORY_LINEBREAK,
+    _constants.CATEGORY_UNI_SPACE,
+    _constants.CATEGORY_UNI_NOT_DIGIT,
+    _constants.CATEGORY_UNI_NOT_WORD,
+    _constants.CATEGORY_UNI_LINEBREAK,
+}
+
+
+def _newline_reach(subpattern, flags: int) -> float:
+    """Return the upper bound of "\n" which `subpattern` (parsed by `re._parser`) may consume,
+    including those of lookahead. Unknown constructs are regarded as unbounded.
+    """
+    c = _constants
+    total = 0
+    for op, av in subpattern:
+        if op is c.LITERAL:
+            n = int(av == 10)
+        elif op is c.NOT_LITERAL:
+            n = int(av != 10)
+        elif op is c.ANY:
+            n = int(bool(flags & re.DOTALL))
+        elif op is c.IN:
+            n = int(_in_matches_newline(av))
+        elif op is c.AT:
+            n = 0
+        elif op is c.BRANCH:
+            n = max(_newline_reach(branch, flags) for branch in av[1])
+        elif op is c.SUBPATTERN:
+            (_, add_flags, del_flags, sub) = av
+            n = _newline_reach(sub, (flags | add_flags) & ~del_flags)
+        elif op in (c.MAX_REPEAT, c.MIN_REPEAT, getattr(c, "POSSESSIVE_REPEAT", None)):
+            (_, max_count, sub) = av
+            n = _newline_reach(sub, flags)
+            if n:
+                n = math.inf if max_count == c.MAXREPEAT else n * max_count
+        elif op in (c.ASSERT, c.ASSERT_NOT):
+            (direction, sub) = av
+            n = _newline_reach(sub, flags)
+            # Lookbehind over lines depends on the text before the restarted line.
+            if direction < 0 and n:
+                n = math.inf
+        elif op is getattr(c, "ATOMIC_GROUP", None):
+            n = _newline_reach(av, flags)
+        else:
+            n = math.inf
+        total += n
+    return total
+
+
+def _in_matches_newline(items) -> bool:
+    c = _constants
+    negate = False
+    found = False
+    for op, av in items:
+        if op is c.NEGATE:
+            negate = True
+        elif op is c.LITERAL:
+            found |= av == 10
+        elif op is c.RANGE:
+            found |= av[0] <= 10 <= av[1]
+        elif op is c.CATEGORY:
+            found |= av in _NEWLINE_CATEGORIES
+        else:
+            return True
+    return found != negate
+
+
+def _split_lines(tokensource, n_line: int) -> List[LineTokens]:
+    """Split the tokens into the tokens of lines."""
+    lines: List[LineTokens] = []
+    current = []
+    for ttype, value in tokensource:
+        for piece in value.splitlines(True):
+            current.append((ttype, piece))
+            if piece.endswith("\n"):
+                lines.append(tuple(current))
+                current = []
+    if current:
+        lines.append(tuple(current))
+    lines += [()] * (n_line - len(lines))
+    return lines[:n_line]
+
+
+def _common_prefix(old: Sequence[str], new: Sequence[str]) -> int:
+    n = 0
+    for a, b in zip(old, new):
+        if a != b:
+            break
+        n += 1
+    return n
+
+
+def _common_suffix(old: Sequence[str], new: Sequence[str], n_prefix: int) -> int:
+    n = 0
+    limit = min(len(old), len(new)) - n_prefix
+    while n < limit and old[len(old) - 1 - n] == new[len(new) - 1 - n]:
+        n += 1
+    return n
+
+
+if __name__ == "__main__":
+    pass
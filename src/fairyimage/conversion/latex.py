@@ -4,16 +4,20 @@
 You should consider various ways for conversion.  
 
 """
-import os
+import functools
+import threading
 import numpy as np
 from PIL import Image, ImageOps
-import matplotlib.pyplot as plt
-from figpptx.image_misc import artists_to_image
+from matplotlib.font_manager import FontProperties
+from matplotlib.mathtext import MathTextParser
+from fairyimage import rendering
+from fairyimage.rendering import artists_to_image
 from pdf2image import convert_from_path, convert_from_bytes
 from fairyimage.color import Color
 
 from pathlib import Path
 import subprocess
+import tempfile
 
 from fairyimage import vstack
 from fairyimage.operations import resize
@@ -58,6 +62,13 @@ def gen_document(text, color: Color = None):
     return doc
 
 
+# To avoid the harmful effects of expansion,
+# Large DPI is used for conversion to `PNG`,
+# and shrinkage is performed.
+PNG_DPI = 960
+LATEX_FONTSIZE = 12
+
+
 def via_pdf(text, fontsize: int = 24,
             color: Color = None,
             target_dpi: int=96, 
@@ -66,21 +77,28 @@ def via_pdf(text, fontsize: int = 24,
 
     target_dpi: The dpi which corresponds to `fontsize`. 
     """
-
-    # Here, fontsize is used 
-    # To avoid the harmful effects of expansion, 
-    # Large DPI is used for conversion to `PNG`, 
-    # and shrinkage is performed. 
-    
-    PNG_DPI = 960
-    LATEX_FONTSIZE = 12
-
-    path = _this_folder / "__latex__.tex"
-    pdf_path = _this_folder / "__latex__.pdf"
-    if path.exists():
-        os.unlink(path)
-    if pdf_path.exists():
-        os.unlink(pdf_path)
+    # Each call uses its own folder, so that calls may run concurrently.
+    with tempfile.TemporaryDirectory() as folder:
+        path = Path(folder) / "__latex__.tex"
+        pdf_path = path.with_suffix(".pdf")
+        path.write_text(gen_source(text, color), encoding="utf8")
+
+        # The same command as the async variant, `aio._run_lualatex`.
+        ret = subprocess.run(
+            ["lualatex", "-interaction=nonstopmode", path.name],
+            cwd=path.parent,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        if ret.returncode != 0:
+            raise ValueError("Failed to compile the latex.")
+        assert pdf_path.exists()
+        return pdf_to_image(pdf_path, fontsize=fontsize, target_dpi=target_dpi, transparent=transparent)
+
+
+def gen_source(text, color: Color = None) -> str:
+    """Return the whole content of `.tex` file for `via_pdf`."""
     if color is not None:
         color = Color(color)
 
@@ -90,21 +108,23 @@ def via_pdf(text, fontsize: int = 24,
 
     lines = [documentclass, preamble, doc]
 
-
     # When you use `ipython` or other's 
     # it may corrupt the `lines`. 
     # To counter this problem,  
     # experimentally, `modification` of `lines` are performed.
     lines = [line.strip() for line in "\n".join(lines).split("\n") if line.strip()]
+    return "\n".join(lines)
+
 
-    path.write_text("\n".join(lines), encoding="utf8")
+def pdf_to_image(pdf_path, fontsize: int = 24, target_dpi: int = 96, transparent: bool = True) -> Image.Image:
+    """Convert `pdf_path` compiled by `lualatex` to the image of `fontsize`.
 
-    ret = subprocess.run(f"lualatex {path}", shell=True, input="", cwd=path.parent, encoding="utf8")
-    if ret.returncode != 0:
-        raise ValueError("Failed to compile the latex.")
-    assert ret.returncode == 0
-    assert pdf_path.exists()
-    images = convert_from_path(pdf_path, transparent=transparent, dpi=PNG_DPI, fmt="png")
+    `pdf_path` may also be the `bytes` of PDF, which do not depend on the file.
+    """
+    if isinstance(pdf_path, bytes):
+        images = convert_from_bytes(pdf_path, transparent=transparent, dpi=PNG_DPI, fmt="png")
+    else:
+        images = convert_from_path(pdf_path, transparent=transparent, dpi=PNG_DPI, fmt="png")
     image = vstack(images)
 
     # Since this image seems large, so
@@ -133,19 +153,91 @@ def via_matplotlib(formula, fontsize=18) -> Image.Image:
     base_fontsize = 18
     sampling_ratio = 2.0
     dpi = fontsize / base_fontsize * base_dpi * sampling_ratio
-    fig, ax = plt.subplots(dpi=dpi)
     if not formula.startswith("$"):
         formula = f"${formula}$"
-    text = fig.text(0, 0.5, f"{formula}", fontsize=base_fontsize)
-    image = artists_to_image(text, is_tight=True)
+    with rendering.pooled_figure(dpi=dpi) as fig:
+        # Only `text` should be visible on the canvas.
+        fig.patch.set_alpha(0.0)
+        text = fig.text(0, 0.5, f"{formula}", fontsize=base_fontsize)
+        image = artists_to_image(text, is_tight=True)
     if sampling_ratio != 1:
         width = round(image.size[0] / sampling_ratio)
         height = round(image.size[1] / sampling_ratio)
         image = image.resize((width, height), Image.BICUBIC)
-    plt.close(fig)
     return image
 
 
+def via_mathtext(text, fontsize: int = 24,
+                 color: Color = None,
+                 target_dpi: int = 96,
+                 transparent: bool = True) -> Image.Image:
+    """Rasterize `text` with `mathtext` of `matplotlib` directly.
+
+    Neither `Figure` nor over-sampling is used, and the result is cached
+    with respect to the arguments, so this is far faster than `via_pdf`.
+    The arguments are the same as `via_pdf`,
+    but only the subset of `latex` which `mathtext` supports is acceptable.
+    """
+    if not text.startswith("$"):
+        text = f"${text}$"
+    color = Color(color if color is not None else (0, 0, 0))
+    image = _render_mathtext(text, fontsize, color, target_dpi, transparent)
+    return image.copy()
+
+
+@functools.lru_cache(maxsize=256)
+def _render_mathtext(text, fontsize, color, target_dpi, transparent) -> Image.Image:
+    # The fonts of `matplotlib` are shared among threads.
+    with _mathtext_lock:
+        parsed = _mathtext_parser.parse(text, dpi=target_dpi, prop=FontProperties(size=fontsize))
+    alpha = Image.fromarray(np.asarray(parsed.image))
+    bbox = alpha.getbbox()
+    if bbox:
+        alpha = alpha.crop(bbox)
+    image = Image.new("RGBA", alpha.size, color.rgb + (0,))
+    image.putalpha(alpha)
+    if not transparent:
+        background = Image.new("RGBA", image.size, (255, 255, 255, 255))
+        image = Image.alpha_composite(background, image).convert("RGB")
+    return image
+
+
+_mathtext_parser = MathTextParser("agg")
+_mathtext_lock = threading.Lock()
+
+
+def is_formula(text) -> bool:
+    """Return whether `text` is just one formula enclosed by `$`."""
+    text = text.strip()
+    return len(text) >= 2 and text.startswith("$") and text.endswith("$") and text.count("$") == 2
+
+
+def from_latex(text, method: str = "pdf", **kwargs) -> Image.Image:
+    """Convert `text` to an image with `method`.
+
+    * "pdf": `via_pdf` (default).
+    * "mathtext": `via_mathtext`.
+    * "auto": `via_mathtext` if `text` is one formula which `mathtext` can parse,
+      otherwise `via_pdf`.
+
+    Notice that `mathtext` uses the fonts of `matplotlib` (e.g. DejaVu),
+    so the glyphs and the sizes differ from those of `lualatex`.
+    """
+    if method == "mathtext":
+        return via_mathtext(text, **kwargs)
+    if method == "pdf":
+        return via_pdf(text, **kwargs)
+    if method != "auto":
+        raise ValueError(f"`method` must be one of `auto`, `mathtext` and `pdf`, but `{method}`.")
+    if is_formula(text):
+        try:
+            return via_mathtext(text, **kwargs)
+        except ValueError:
+            # Unsupported commands of `mathtext`.
+            pass
+    return via_pdf(text, **kwargs)
+
+
 if __name__ == "__main__":
     image = via_matplotlib(r"\frac{\sqrt{2}^2}{35 - 5} - \sqrt{3} = ?", 72)
     print(image.size)
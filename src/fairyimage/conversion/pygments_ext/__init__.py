@@ -32,8 +32,10 @@ import numpy as np
 from pygments.formatters.img import FontNotFound
 import pygments.formatters.img
 from pygments import highlight
+from pygments import format as pygments_format
 
 from fairyimage.conversion.pygments_ext.win_font import WinFontCollector
+from fairyimage.conversion.tokens import get_tokens
 
 
 class FontManager(pygments.formatters.img.FontManager):
@@ -166,7 +168,8 @@ class ImageDivider:
         if not isinstance(formatter, ImageFormatter):
             raise ValueError(f"Formatter must be `{pygments_ext.ImageFormatter}`.")
 
-        buf = BytesIO(highlight(source, lexer, formatter))
+        # The tokens are shared with `PygmentsCaller.to_image`.
+        buf = BytesIO(pygments_format(get_tokens(source, lexer), formatter))
         image = Image.open(buf).copy()
         buf.close()
 
@@ -11,12 +11,14 @@ from io import BytesIO
 
 import numpy as np
 from PIL import Image
-from pygments import highlight
+from pygments import format as pygments_format
 from pygments.lexers import find_lexer_class
 from pygments.lexers import guess_lexer, guess_lexer_for_filename
 from pygments.lexer import Lexer
 
 from fairyimage.conversion import pygments_ext
+from fairyimage.conversion.svg import format_svg
+from fairyimage.conversion.tokens import get_tokens
 
 
 class PygmentsCaller:
@@ -43,17 +45,29 @@ class PygmentsCaller:
         self.options = options  # Formatter options.
 
     def to_image(self, source):
-        """To image"""
+        """To image.
+        The tokens of `source` are cached, so the variants of
+        `style`, `fontname` and `fontsize` are rendered without lexing again.
+        """
         lexer = self._yield_lexer(self.lexer, source)
         source = self._to_content(source)
         formatter = pygments_ext.ImageFormatter(
             fontname=self.fontname, fontsize=self.fontsize, **self.options
         )
-        buf = BytesIO(highlight(source, lexer, formatter))
+        buf = BytesIO(pygments_format(get_tokens(source, lexer), formatter))
         image = Image.open(buf).copy()
         buf.close()
         return image
 
+    def to_svg(self, source):
+        """To `SVG` text, with the same layout as `to_image`."""
+        lexer = self._yield_lexer(self.lexer, source)
+        source = self._to_content(source)
+        formatter = pygments_ext.ImageFormatter(
+            fontname=self.fontname, fontsize=self.fontsize, **self.options
+        )
+        return format_svg(get_tokens(source, lexer), formatter)
+
     def to_images(self, source, n_image=3, break_criterion=None):
         """Return list of images.
         Intuitively, this functions divides the images vertically
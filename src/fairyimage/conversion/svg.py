@@ -0,0 +1,130 @@
+"""Vector (`SVG`) output of source code.
+
+`pygments.formatters.img.ImageFormatter` measures the layout of texts
+(`_create_drawables`) and then paints pixels.
+Here, the same layout is emitted as `SVG` text runs, so the result is
+small and resolution-independent.
+
+* The positions and widths of the runs are the measured ones,
+  and `textLength` keeps them even if the viewer substitutes the font.
+* `rasterize` converts `SVG` to `PIL.Image` at any scale,
+  which requires `cairosvg`.
+
+Example
+----------
+formatter = pygments_ext.ImageFormatter(style="friendly")
+svg = format_svg(get_tokens(source, PythonLexer()), formatter)
+image = rasterize(svg, scale=2.0)
+"""
+
+from io import BytesIO
+from typing import Iterable, Optional, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from PIL import Image
+
+
+def format_svg(tokensource: Iterable, formatter) -> str:
+    """Lay out `tokensource` with `formatter` (`ImageFormatter`), and return `SVG`."""
+    formatter.drawables = []
+    formatter._create_drawables(tokensource)
+    formatter._draw_line_numbers()
+    (width, height) = formatter._get_image_size(formatter.maxlinelength, formatter.maxlineno)
+
+    elements = [_rect((0, 0, width, height), formatter.background_color)]
+    elements += _line_number_bg(formatter, height)
+    if formatter.hl_lines:
+        x = formatter.image_pad + formatter.line_number_width - formatter.line_number_pad + 1
+        line_height = formatter._get_line_height()
+        for number in formatter.hl_lines:
+            y = formatter._get_line_y(number - 1)
+            elements.append(_rect((x, y, width, y + line_height), formatter.hl_color))
+    for (x, y), value, font, text_fg, text_bg in formatter.drawables:
+        if text_bg:
+            (right, lower) = font.getbbox(value)[2:]
+            elements.append(_rect((x, y, x + right, y + lower), text_bg))
+        text_width, _ = formatter.fonts.get_text_size(value)
+        elements.append(_text((x, y), value, font, text_fg, text_width))
+
+    header = (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" xml:space="preserve">'
+    )
+    return "\n".join([header, *elements, "</svg>"]) + "\n"
+
+
+def rasterize(svg: str, scale: float = 1.0) -> Image.Image:
+    """Convert `svg` to `PIL.Image`, enlarged by `scale`. `cairosvg` is required."""
+    try:
+        import cairosvg
+    except ImportError as e:
+        raise ImportError("`cairosvg` is required for rasterization of `SVG`.") from e
+    data = cairosvg.svg2png(bytestring=svg.encode("utf8"), scale=scale)
+    with Image.open(BytesIO(data)) as image:
+        return image.convert("RGB")
+
+
+def _line_number_bg(formatter, height):
+    # Equivalent to `ImageFormatter._paint_line_number_bg`.
+    if not formatter.line_numbers or formatter.line_number_fg is None:
+        return []
+    right = formatter.image_pad + formatter.line_number_width - formatter.line_number_pad
+    elements = [_rect((0, 0, right + 1, height), formatter.line_number_bg)]
+    if formatter.line_number_separator:
+        elements.append(_rect((right, 0, right + 1, height), formatter.line_number_fg))
+    return elements
+
+
+def _rect(box: Tuple[int, int, int, int], fill: Optional[str]) -> str:
+    (left, upper, right, lower) = box
+    return (
+        f'<rect x="{left}" y="{upper}" width="{right - left}" height="{lower - upper}" '
+        f"fill={quoteattr(_to_color(fill))}/>"
+    )
+
+
+def _text(pos, value: str, font, fill, text_width: int) -> str:
+    (x, y) = pos
+    # `PIL` places the ascender at `y`, while `SVG` places the baseline.
+    try:
+        ascent, _ = font.getmetrics()
+    except AttributeError:
+        ascent = font.getbbox("A")[3]
+    attributes = [
+        f'x="{x}"',
+        f'y="{y + ascent}"',
+        f"fill={quoteattr(_to_color(fill))}",
+        f'textLength="{text_width}"',
+        'lengthAdjust="spacingAndGlyphs"',
+    ] + _font_attributes(font)
+    return f"<text {' '.join(attributes)}>{escape(value)}</text>"
+
+
+def _font_attributes(font):
+    try:
+        family, style = font.getname()
+    except (AttributeError, OSError):
+        family, style = "monospace", ""
+    size = getattr(font, "size", None) or font.getbbox("A")[3]
+    attributes = [
+        f"font-family={quoteattr(f'{family}, monospace')}",
+        f'font-size="{size}"',
+    ]
+    style = (style or "").lower()
+    if "bold" in style:
+        attributes.append('font-weight="bold"')
+    if "italic" in style or "oblique" in style:
+        attributes.append('font-style="italic"')
+    return attributes
+
+
+def _to_color(color) -> str:
+    if color is None:
+        return "none"
+    if isinstance(color, tuple):
+        return "#" + "".join(f"{int(value):02x}" for value in color[:3])
+    return str(color)
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,88 @@
+"""Cache of the token streams of `pygments`.
+
+Lexing depends only on the source and the lexer,
+while `style`, `fontname` and `fontsize` are the matters of the formatter.
+Hence, the tokens are cached with respect to `(hash of source, lexer)`,
+and the variants of one source are formatted via `pygments.format` without lexing.
+
+Example
+----------
+tokens = get_tokens(source, PythonLexer())
+for style in ["default", "monokai"]:
+    data = pygments.format(tokens, ImageFormatter(style=style))
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from pygments.lexer import Lexer
+
+Tokens = Tuple[Tuple[object, str], ...]
+
+
+class TokenCache:
+    """LRU cache of the token streams.
+
+    Args:
+        maxsize: The maximum number of the token streams kept.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._cache: "OrderedDict[Tuple, Tokens]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_tokens(self, source: str, lexer: Lexer) -> Tokens:
+        """Return the tokens of `source` lexed by `lexer`."""
+        key = _to_key(source, lexer)
+        if key is None:
+            return tuple(lexer.get_tokens(source))
+        with self._lock:
+            tokens = self._cache.get(key)
+            if tokens is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return tokens
+            self.misses += 1
+        tokens = tuple(lexer.get_tokens(source))
+        with self._lock:
+            self._cache[key] = tokens
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return tokens
+
+    def cache_info(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache)}
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+def _to_key(source: str, lexer: Lexer) -> Optional[Tuple]:
+    # Filters may have their states, so such lexers are not cached.
+    if lexer.filters:
+        return None
+    digest = hashlib.sha1(source.encode("utf8")).hexdigest()
+    options = repr(sorted(lexer.options.items()))
+    return (digest, type(lexer).__module__, type(lexer).__qualname__, options)
+
+
+_default_cache = TokenCache()
+
+
+def get_tokens(source: str, lexer: Lexer) -> Tokens:
+    """Return the tokens of `source` via the default `TokenCache`."""
+    return _default_cache.get_tokens(source, lexer)
+
+
+def get_cache() -> TokenCache:
+    return _default_cache
+
+
+if __name__ == "__main__":
+    pass
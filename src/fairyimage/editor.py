@@ -1,16 +1,19 @@
+import math
 import numpy as np
-from typing import Optional, Union, Tuple, Iterable, List, Dict, Any
-from PIL import Image, ImageOps
-import io
-import matplotlib.pyplot as plt
+from typing import Optional, Union, Tuple, Iterable, List, Dict, Any, Sequence
+from PIL import Image
 import matplotlib
 matplotlib.use("Agg")
+from matplotlib.transforms import IdentityTransform
 
+from fairyimage import rendering
+from fairyimage.cache import cached
 from fairyimage.color import Color
-from fairyimage.image_array import ImageArray
-from fairyimage.operations import AlignMode, concatenate, resize, yield_size
+from fairyimage.image_array import ImageArray, unique_tiles
+from fairyimage.operations import AlignMode, resize_many, shrink, yield_size
 
 
+@cached("make_logo")
 def make_logo(
     s: str,
     fontsize: int = 36,
@@ -47,18 +50,6 @@ def make_logo(
 
     target = make_str(s, fontsize=fontsize, color=fontcolor)
 
-    def _to_padded_size(size, margin) -> Tuple[int, int]:
-        if isinstance(margin, int):
-            return (size[0] + margin, size[1] + margin)
-        elif isinstance(margin, float):
-            size = (
-                size[0] * (1 + margin),
-                size[1] * (1 + margin),
-            )
-            return (round(size[0]), round(size[1]))
-        else:
-            raise NotImplementedError(f"Currently, not implemented type for `margin`.")
-
     def _from_padded_size(size, margin) -> Tuple[int, int]:
         if isinstance(margin, Iterable):
             margin = [-elem for elem in margin]
@@ -81,6 +72,21 @@ def make_logo(
         return result
 
 
+def _to_padded_size(size, margin) -> Tuple[int, int]:
+    """Return the size of logo whose content's size is `size`."""
+    if isinstance(margin, int):
+        return (size[0] + margin, size[1] + margin)
+    elif isinstance(margin, float):
+        size = (
+            size[0] * (1 + margin),
+            size[1] * (1 + margin),
+        )
+        return (round(size[0]), round(size[1]))
+    else:
+        raise NotImplementedError(f"Currently, not implemented type for `margin`.")
+
+
+@cached("make_str")
 def make_str(s: str, fontsize=48, color: Color = (0, 0, 0)) -> Image.Image:
     """
     Return: Image.Image.
@@ -97,59 +103,183 @@ def make_str(s: str, fontsize=48, color: Color = (0, 0, 0)) -> Image.Image:
     -------
     * Currently, completely white `str` is impossible.
     * If fontsize is very large, then it may failed.
+    * The same rendering as `make_strs` is used,
+      so that the labels are identical whichever function renders them.
+    """
+    return make_strs([s], fontsize=fontsize, color=color)[0]
+
+
+def make_strs(
+    strings: Iterable[str], fontsize=48, color: Color = (0, 0, 0)
+) -> List[Image.Image]:
+    """Return the images of `strings`, which are rendered in one figure.
+
+    Each image has the same properties as `make_str`,
+    but the figure is created and drawn only once for all the `strings`.
     """
 
     def _to_mcolor(color):
         return [v / 255 for v in color.rgb]
 
-    fig, ax = plt.subplots()
+    strings = list(strings)
     color = Color(color)
-    t = ax.text(
-        0.01,
-        0.01,
-        s,
-        color=_to_mcolor(color),
-        fontsize=fontsize,
-        fontfamily="Meiryo",
-        fontweight="bold",
-    )
-    fig.patch.set_alpha(0.0)
-    fig.tight_layout()
-    ax.axis("off")
-    with io.BytesIO() as buf:
-        fig.savefig(buf, transparent=True, format="png")
-        buf.seek(0)
-        image = Image.open(buf)
-        image.load()
-        inv_image = ImageOps.invert(image.convert("RGB"))
-        cropped = image.crop(inv_image.getbbox())
-    plt.close(fig)
-    return cropped
-
-
-def put(front: Image.Image, back: Image.Image, align="center"):
+    with rendering.pooled_figure() as fig:
+        fig.patch.set_alpha(0.0)
+        # The texts are placed in pixels, since the glyphs are rendered
+        # at the sub-pixel positions of their origins.
+        texts = [
+            fig.text(
+                0,
+                0,
+                s,
+                color=_to_mcolor(color),
+                fontsize=fontsize,
+                fontfamily="Meiryo",
+                fontweight="bold",
+                verticalalignment="baseline",
+                transform=IdentityTransform(),
+            )
+            for s in strings
+        ]
+
+        # The sizes of texts are measured in whole pixels, and the figure is
+        # re-sized so that all the texts are placed vertically without overlaps.
+        renderer = fig.canvas.get_renderer()
+        extents = [text.get_window_extent(renderer) for text in texts]
+        margin = max(4, round(fontsize * fig.dpi / 72 * 0.25))
+        widths = [math.ceil(extent.x1) - math.floor(extent.x0) for extent in extents]
+        heights = [math.ceil(extent.y1) - math.floor(extent.y0) for extent in extents]
+        width = max(widths + [1]) + 2 * margin
+        height = sum(h + margin for h in heights) + margin
+        fig.set_size_inches(width / fig.dpi, height / fig.dpi)
+        y = height - margin
+        for text, extent, h in zip(texts, extents, heights):
+            y -= h
+            # The origin (the baseline) is snapped to the whole pixel.
+            text.set_position((margin - math.floor(extent.x0), y - math.floor(extent.y0)))
+            y -= margin
+
+        view = rendering.draw(fig)
+        renderer = fig.canvas.get_renderer()
+        results = []
+        for text in texts:
+            box = rendering.to_box(text.get_window_extent(renderer), view.size)
+            region = view.crop(box)
+            results.append(region.crop(region.getchannel("A").getbbox()))
+    return results
+
+
+def put(
+    front: Image.Image,
+    back: Image.Image,
+    align="center",
+    *,
+    position: Optional[Tuple[int, int]] = None,
+    inplace: bool = False,
+):
     """Put `front` image on `back` image following
     to `align` mode.
+
+    Args:
+        align: `AlignMode` specification, applied to both axes,
+               or a pair of them for `(horizontal, vertical)`.
+        position: If given, the upper left corner of `front` in `back`.
+        inplace: If True, `back` is modified and returned without copy.
     """
-    assert align == "center", "Current limitation."
-    b_size = back.size
-    f_size = front.size
-    if align == "center":
-        box = ((b_size[0] - f_size[0]) // 2, (b_size[1] - f_size[1]) // 2)
+    if position is None:
+        position = _to_position(front.size, back.size, align)
+    ret = back if inplace else back.copy()
+    ret.paste(front, box=tuple(position), mask=front)
+    return ret
+
+
+def put_all(
+    items: Iterable[Tuple[Image.Image, Any]],
+    back: Image.Image,
+    *,
+    inplace: bool = False,
+) -> Image.Image:
+    """Composite many images on `back` in a single pass.
+
+    Args:
+        items: Pairs of `(front, placement)`.
+            `placement` is `(x, y)` of `int` for the upper left corner,
+            or `align` specification of `put`.
+        inplace: If True, `back` is modified and returned without copy.
+            `back` must be `RGBA` in this case.
+
+    Note
+    ------
+    Unlike `put`, alpha compositing (`Image.alpha_composite`) is performed
+    only on the region of each `front`, which may be partially outside of `back`.
+    """
+    if back.mode != "RGBA":
+        if inplace:
+            raise ValueError("In `inplace` mode, `back` must be `RGBA`.")
+        ret = back.convert("RGBA")
     else:
-        raise ValueError(f"Not Impleneted align mode, `{align}`.")
-    ret = back.copy()
-    ret.paste(front, box=box, mask=front)
+        ret = back if inplace else back.copy()
+
+    for front, placement in items:
+        if _is_position(placement):
+            x, y = placement
+        else:
+            x, y = _to_position(front.size, ret.size, placement)
+        # Clip the region of `front` into `ret`.
+        s_left, s_upper = max(0, -x), max(0, -y)
+        s_right = min(front.size[0], ret.size[0] - x)
+        s_lower = min(front.size[1], ret.size[1] - y)
+        if s_right <= s_left or s_lower <= s_upper:
+            continue
+        if front.mode != "RGBA":
+            front = front.convert("RGBA")
+        ret.alpha_composite(
+            front,
+            dest=(x + s_left, y + s_upper),
+            source=(s_left, s_upper, s_right, s_lower),
+        )
     return ret
 
 
+def _is_position(placement) -> bool:
+    return (
+        isinstance(placement, Sequence)
+        and not isinstance(placement, str)
+        and len(placement) == 2
+        and all(isinstance(v, (int, np.integer)) for v in placement)
+    )
+
+
+def _to_position(f_size, b_size, align) -> Tuple[int, int]:
+    """Return the upper left corner of `f_size` aligned in `b_size`."""
+    if isinstance(align, (str, AlignMode, float, int)):
+        aligns = (align, align)
+    else:
+        aligns = align
+    position = []
+    for f_length, b_length, elem in zip(f_size, b_size, aligns):
+        mode = AlignMode(elem)
+        if mode == AlignMode.START:
+            position.append(0)
+        elif mode == AlignMode.CENTER:
+            position.append((b_length - f_length) // 2)
+        elif mode == AlignMode.END:
+            position.append(b_length - f_length)
+        else:
+            raise ValueError(f"Not Impleneted align mode, `{align}`.")
+    return tuple(position)
+
+
 def frame(
     image: Image.Image, color: Color = (0, 0, 0), width: int = 3, inner=False
 ) -> Image.Image:
     """Frame the `image` with `line`.
 
+    `ImageArray` and stacked `np.ndarray` whose shape is `(..., H, W, C)`
+    are also accepted, and all the images are framed at once.
+
     Return:
-        `PIL.Image`.
+        `PIL.Image`. (`ImageArray` / `np.ndarray` for them.)
         If `inner` is `True`, then the size is equal to given `image`.
         If not, 2 * `width` is added to the each length.
     """
@@ -157,6 +287,8 @@ def frame(
         return _frame_image(image, color, width, inner)
     elif isinstance(image, ImageArray):
         return _frame_image_array(image, color, width, inner)
+    elif isinstance(image, np.ndarray):
+        return _frame_array(image, color, width, inner)
 
     raise ValueError(f"f`{type(image)}` is not accepted as `image`.")
 
@@ -166,15 +298,8 @@ def _frame_image(
 ):
     if width == 0:
         return image.copy()
-    cv = np.array(Color(color).rgba)
     img = np.array(image.convert("RGBA"))
-    if not inner:
-        img = np.pad(img, pad_width=((width, width), (width, width), (0, 0)))
-    img[:width, :, :] = cv[None, None, :]
-    img[-width:, :, :] = cv[None, None, :]
-    img[:, :width, :] = cv[None, None, :]
-    img[:, -width:, :] = cv[None, None, :]
-    return Image.fromarray(img)
+    return Image.fromarray(_frame_array(img, color, width, inner))
 
 
 def _frame_image_array(
@@ -184,12 +309,31 @@ def _frame_image_array(
     The inner line width must be the half of the outer line width.
     """
     if width == 0:
-        return image.copy()
-
-    def _inner(image):
-        return _frame_image(image, color, width, inner)
-
-    return images.map(_inner)
+        return images.map(Image.Image.copy)
+    # Only the unique tiles are framed.
+    uniques, inverse = unique_tiles(images.tiles)
+    stacked = np.stack([np.array(image.convert("RGBA")) for image in uniques])
+    framed = [Image.fromarray(elem) for elem in _frame_array(stacked, color, width, inner)]
+    return ImageArray([framed[index] for index in inverse]).reshape(images.shape)
+
+
+def _frame_array(
+    array: np.ndarray, color: Color = (0, 0, 0), width: int = 3, inner=False
+) -> np.ndarray:
+    """Frame the stacked images, `(..., H, W, C)` at once."""
+    if width == 0:
+        return array.copy()
+    cv = np.array(Color(color).rgba, dtype=np.uint8)[: array.shape[-1]]
+    if inner:
+        array = array.copy()
+    else:
+        pad_width = [(0, 0)] * (array.ndim - 3) + [(width, width), (width, width), (0, 0)]
+        array = np.pad(array, pad_width=pad_width)
+    array[..., :width, :, :] = cv
+    array[..., -width:, :, :] = cv
+    array[..., :, :width, :] = cv
+    array[..., :, -width:, :] = cv
+    return array
 
 
 def contained(image: Image.Image, region: Tuple[int, int]) -> Image.Image:
@@ -209,7 +353,7 @@ def contained(image: Image.Image, region: Tuple[int, int]) -> Image.Image:
     if len(region) != 2:
         raise ValueError(f"Invalid region specification. `{region}`")
     ratio = min(region[0] / size[0], region[1] / size[1])
-    return image.resize((round(size[0] * ratio), round(size[1] * ratio)))
+    return shrink(image, (round(size[0] * ratio), round(size[1] * ratio)))
 
 
 def equalize(
@@ -266,7 +410,7 @@ def equalize(
             )
         width = int(round(np.mean([size[0] for size in sizes])))
         height = int(round(np.mean([size[1] for size in sizes])))
-        return [image.resize((width, height)) for image in images]
+        return resize_many(images, [(width, height)] * len(images))
 
     if axis not in {"width", "height"}:
         raise ValueError("Invalid specification of axis.", axis)
@@ -276,15 +420,14 @@ def equalize(
             length = min(size[0] for size in sizes)
         else:
             length = min(size[1] for size in sizes)
-        r_images = []
+        r_sizes = []
         for image in images:
             if axis == "width":
                 size = (length, image.size[1] * (length / image.size[0]))
             else:
                 size = (image.size[0] * (length / image.size[1]), length)
-            size = tuple(map(round, size))
-            r_images.append(image.resize(size, Image.BICUBIC))
-        return r_images
+            r_sizes.append(tuple(map(round, size)))
+        return resize_many(images, r_sizes, Image.BICUBIC)
 
     try:
         mode = AlignMode(mode)
@@ -293,49 +436,36 @@ def equalize(
         pass
     else:
 
-        r_images = []
         if axis == "width":
             length = max(size[0] for size in sizes)
         else:
             length = max(size[1] for size in sizes)
 
-        def _make_c_targets(image, axis, offset, mode):
-            size = list(image.size)
-            pil_axis = 0 if axis == "width" else 1
-            # If offset == 1, then `center` is equal to `START`.
-            if offset == 1:
-                mode = AlignMode.START
-            if mode == AlignMode.START or mode == AlignMode.END:
-                size[pil_axis] = offset
-                pad = Image.new("RGBA", size=size, color=(255, 255, 255, 0))
-                if mode == AlignMode.START:
-                    targets = (image, pad)
-                if mode == AlignMode.END:
-                    targets = (pad, image)
-                return targets
+        def _to_offset(offset, mode):
+            if mode == AlignMode.START:
+                return 0
+            if mode == AlignMode.END:
+                return offset
             if mode == AlignMode.CENTER:
-                s_offset = offset // 2
-                s_size = list(size)
-                s_size[pil_axis] = s_offset
-                s_pad = Image.new("RGBA", size=s_size, color=(255, 255, 255, 0))
-                e_offset = offset - s_offset
-                e_size = list(size)
-                e_size[pil_axis] = e_offset
-                e_pad = Image.new("RGBA", size=e_size, color=(255, 255, 255, 0))
-                targets = (s_pad, image, e_pad)
-                return targets
+                return offset // 2
             raise NotImplementedError("Bug.", mode)
 
+        # The padded images are allocated as the final canvases,
+        # and `image` is pasted on them only once.
+        r_images = []
         for image in images:
-            if axis == "width":
-                offset = length - image.size[0]
-            else:
-                offset = length - image.size[1]
-            if offset:
-                targets = _make_c_targets(image, axis, offset, mode)
-                r_images.append(concatenate(targets, axis=axis))
-            else:
+            pil_axis = 0 if axis == "width" else 1
+            offset = length - image.size[pil_axis]
+            if not offset:
                 r_images.append(image)
+                continue
+            size = list(image.size)
+            size[pil_axis] = length
+            box = [0, 0]
+            box[pil_axis] = _to_offset(offset, mode)
+            canvas = Image.new("RGBA", size=tuple(size), color=(255, 255, 255, 0))
+            canvas.paste(image.convert("RGBA"), tuple(box))
+            r_images.append(canvas)
         return r_images
 
     raise ValueError("Invalid specification of mode", mode)
@@ -0,0 +1,354 @@
+"""Writing images to files.
+
+`PNGStreamWriter` writes a `PNG` file band by band,
+hence the whole image is not required to be kept in memory.
+
+`save` and `encode` are the output stage of the composites
+(`thumbnail`, `ImageArray`, `Captioner`), where the file size is traded
+against the encoding time via `preset`.
+
+* "fast": `PNG` of low compression, for previews and intermediates.
+* "balanced": The default.
+* "small": High compression with the adaptive filter of `Pillow`, in serial.
+           Images of at most 256 colors, such as code renders,
+           are written as palette images without loss.
+
+`PNG` is compressed in parallel strips, by the independent `deflate` streams
+joined with `Z_SYNC_FLUSH`, which is still one valid `zlib` stream.
+
+Example
+----------
+save(image_array, "mosaic.png", preset="fast")
+save(thumbnail(images), "thumb.webp", quality=80)
+data = encode(image, format="png", compress_level=9, filter="up", quantize=True)
+"""
+
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union, BinaryIO
+
+import numpy as np
+from PIL import Image
+
+# `mode` -> (`color type` of PNG, the number of channels.)
+_PNG_COLOR_TYPES = {"L": (0, 1), "RGB": (2, 3), "LA": (4, 2), "RGBA": (6, 4), "P": (3, 1)}
+
+# The filter types of rows in `PNG`.
+PNG_FILTERS = {"none": 0, "sub": 1, "up": 2}
+
+# format -> preset -> options.
+PRESETS: Dict[str, Dict[str, Dict]] = {
+    "png": {
+        "fast": {"compress_level": 1, "filter": "up", "quantize": False},
+        "balanced": {"compress_level": 6, "filter": "up", "quantize": False},
+        "small": {"compress_level": 9, "filter": "adaptive", "quantize": True},
+    },
+    "webp": {
+        "fast": {"quality": 80, "method": 0},
+        "balanced": {"quality": 85, "method": 4},
+        "small": {"quality": 75, "method": 6},
+    },
+    "jpeg": {
+        "fast": {"quality": 85, "optimize": False},
+        "balanced": {"quality": 90, "optimize": True},
+        "small": {"quality": 75, "optimize": True},
+    },
+}
+
+# The number of rows compressed by one task in parallel.
+STRIP_ROWS = 256
+
+
+class PNGStreamWriter:
+    """Write `PNG` whose size is `size` with the bands of rows.
+
+    Args:
+        filter: The filter of rows, "none", "sub" or "up".
+        workers: If more than 1, the rows are compressed in parallel strips of `strip_rows`.
+        palette: The `RGB` palette of "P" mode. (`Image.getpalette()`)
+        transparency: The transparency of "P" mode. (`Image.info["transparency"]`)
+
+    Example
+    ----------
+    with PNGStreamWriter("out.png", size=(width, height)) as writer:
+        for band in bands:
+            writer.write(band)  # `band.width` must be `width`.
+    """
+
+    def __init__(
+        self,
+        fp: Union[str, Path, BinaryIO],
+        size: Tuple[int, int],
+        mode: str = "RGBA",
+        compress_level: int = 6,
+        filter: str = "none",
+        workers: int = 1,
+        strip_rows: int = STRIP_ROWS,
+        palette=None,
+        transparency=None,
+    ):
+        if mode not in _PNG_COLOR_TYPES:
+            raise ValueError(f"`{mode}` is not supported, `{list(_PNG_COLOR_TYPES)}`.")
+        if filter not in PNG_FILTERS:
+            raise ValueError(f"`filter` must be one of `{list(PNG_FILTERS)}`, but `{filter}`.")
+        if mode == "P" and palette is None:
+            raise ValueError("`palette` is required for `P` mode.")
+        if hasattr(fp, "write"):
+            self._fp = fp
+            self._owns_fp = False
+        else:
+            self._fp = open(fp, "wb")
+            self._owns_fp = True
+        self.size = tuple(size)
+        self.mode = mode
+        self.compress_level = compress_level
+        self.filter = filter
+        self.workers = workers
+        self.strip_rows = strip_rows
+        self._n_row = 0
+        self._prev_row = None  # The last row, for "up" filter.
+        if workers > 1:
+            # The strips are raw `deflate`, and the `zlib` header and checksum are written here.
+            self._compressor = None
+            self._adler = 1
+            self._executor = ThreadPoolExecutor(workers)
+            self._started = False
+        else:
+            self._compressor = zlib.compressobj(compress_level)
+            self._executor = None
+        self._closed = False
+
+        color_type, _ = _PNG_COLOR_TYPES[mode]
+        self._fp.write(b"\x89PNG\r\n\x1a\n")
+        ihdr = struct.pack(">IIBBBBB", self.size[0], self.size[1], 8, color_type, 0, 0, 0)
+        self._write_chunk(b"IHDR", ihdr)
+        if mode == "P":
+            self._write_chunk(b"PLTE", bytes(palette))
+            if transparency is not None:
+                if isinstance(transparency, int):
+                    transparency = b"\xff" * transparency + b"\x00"
+                self._write_chunk(b"tRNS", bytes(transparency))
+
+    def write(self, band: Image.Image):
+        """Append the rows of `band`."""
+        if band.width != self.size[0]:
+            raise ValueError(f"The width of band must be `{self.size[0]}`, but `{band.width}`.")
+        if self._n_row + band.height > self.size[1]:
+            raise ValueError("The rows exceed the height of the image.")
+        if band.mode != self.mode:
+            band = band.convert(self.mode)
+        if band.height == 0:
+            return
+        array = np.asarray(band).reshape(band.height, -1)
+        rows = self._filter_rows(array)
+        self._prev_row = array[-1]
+        if self._executor is None:
+            self._write_data(self._compressor.compress(rows.tobytes()))
+        else:
+            self._compress_parallel(rows)
+        self._n_row += band.height
+
+    def close(self):
+        if self._closed:
+            return
+        if self._n_row != self.size[1]:
+            raise ValueError(f"`{self.size[1]}` rows are expected, but `{self._n_row}`.")
+        if self._executor is None:
+            self._write_data(self._compressor.flush())
+        else:
+            self._executor.shutdown()
+            tail = b"" if self._started else _ZLIB_HEADER
+            tail += zlib.compressobj(self.compress_level, zlib.DEFLATED, -15).flush(zlib.Z_FINISH)
+            self._write_data(tail + struct.pack(">I", self._adler & 0xFFFFFFFF))
+        self._closed = True
+        self._write_chunk(b"IEND", b"")
+        if self._owns_fp:
+            self._fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            if self._executor is not None:
+                self._executor.shutdown()
+            if self._owns_fp:
+                self._fp.close()
+
+    def _filter_rows(self, array: np.ndarray) -> np.ndarray:
+        """Return the rows with the filter type at the head of each."""
+        filtered = array
+        if self.filter == "sub":
+            _, n_channel = _PNG_COLOR_TYPES[self.mode]
+            filtered = array.copy()
+            filtered[:, n_channel:] -= array[:, :-n_channel]
+        elif self.filter == "up":
+            prev = self._prev_row if self._prev_row is not None else np.zeros_like(array[0])
+            filtered = array.copy()
+            filtered[1:] -= array[:-1]
+            filtered[0] -= prev
+        types = np.full((array.shape[0], 1), PNG_FILTERS[self.filter], dtype=np.uint8)
+        return np.hstack([types, filtered])
+
+    def _compress_parallel(self, rows: np.ndarray):
+        level = self.compress_level
+
+        def _compress(strip: bytes) -> bytes:
+            compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+            return compressor.compress(strip) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        strips = [rows[i : i + self.strip_rows].tobytes() for i in range(0, len(rows), self.strip_rows)]
+        for strip in strips:
+            self._adler = zlib.adler32(strip, self._adler)
+        for data in self._executor.map(_compress, strips):
+            if not self._started:
+                data = _ZLIB_HEADER + data
+                self._started = True
+            self._write_data(data)
+
+    def _write_data(self, data: bytes):
+        if data:
+            self._write_chunk(b"IDAT", data)
+
+    def _write_chunk(self, tag: bytes, data: bytes):
+        self._fp.write(struct.pack(">I", len(data)))
+        self._fp.write(tag)
+        self._fp.write(data)
+        self._fp.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(tag)) & 0xFFFFFFFF))
+
+
+# `CMF` and `FLG` of `zlib` stream, `deflate` with 32K window.
+_ZLIB_HEADER = b"\x78\x9c"
+
+
+def save(
+    image,
+    fp: Union[str, Path, BinaryIO],
+    format: Optional[str] = None,
+    preset: str = "balanced",
+    **options,
+):
+    """Write `image` to `fp` with the options of `preset` for `format`.
+
+    Args:
+        image: `PIL.Image` or `ImageArray`.
+        format: "png", "webp" or "jpeg". If `None`, it is inferred from the suffix of `fp`.
+        preset: "fast", "balanced" or "small". (See `PRESETS`.)
+        options: They override the options of `preset`.
+            * png: `compress_level`, `filter`, `quantize`, `workers`.
+              `filter` is one of `PNG_FILTERS`, or "adaptive", where the encoder of `Pillow` is used.
+              If `quantize` is True, images of at most 256 colors become "P" mode without loss,
+              and if it is `int`, the image is quantized to `quantize` colors.
+            * webp: `quality`, `method`, `lossless`.
+            * jpeg: `quality`, `optimize`.
+    """
+    if format is None:
+        if hasattr(fp, "write"):
+            raise ValueError("`format` is required for file objects.")
+        format = Path(fp).suffix.lstrip(".")
+    format = _to_format(format)
+    if preset not in PRESETS[format]:
+        raise ValueError(f"`preset` must be one of `{list(PRESETS[format])}`, but `{preset}`.")
+    options = dict(PRESETS[format][preset], **options)
+    image = _to_image(image)
+
+    if format == "png":
+        _save_png(image, fp, **options)
+    elif format == "jpeg":
+        if image.mode not in {"RGB", "L", "CMYK"}:
+            image = image.convert("RGB")
+        image.save(fp, format="JPEG", **options)
+    else:
+        image.save(fp, format="WEBP", **options)
+
+
+def encode(image, format: str = "png", preset: str = "balanced", **options) -> bytes:
+    """Return the bytes of `image` encoded as `save` does."""
+    buf = BytesIO()
+    save(image, buf, format=format, preset=preset, **options)
+    return buf.getvalue()
+
+
+def _save_png(image, fp, compress_level=6, filter="up", quantize=False, workers=None):
+    if quantize:
+        image = _quantize(image, None if quantize is True else int(quantize))
+    if filter == "adaptive":
+        image.save(fp, format="PNG", compress_level=compress_level)
+        return
+    if image.mode not in _PNG_COLOR_TYPES:
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    if image.mode == "P":
+        # `PNG` recommends no filter for palette images.
+        filter = "none"
+        palette = image.getpalette()[: 3 * 256]
+        transparency = image.info.get("transparency")
+    else:
+        palette, transparency = None, None
+    if workers is None:
+        workers = min(os.cpu_count() or 1, 8) if image.height >= 2 * STRIP_ROWS else 1
+    with PNGStreamWriter(
+        fp,
+        size=image.size,
+        mode=image.mode,
+        compress_level=compress_level,
+        filter=filter,
+        workers=workers,
+        palette=palette,
+        transparency=transparency,
+    ) as writer:
+        writer.write(image)
+
+
+def _quantize(image: Image.Image, colors: Optional[int]) -> Image.Image:
+    """Return "P" mode image.
+
+    If `colors` is `None`, only the images of at most 256 colors are converted, without loss.
+    """
+    if image.mode not in {"RGB", "RGBA"}:
+        return image
+    if colors is not None:
+        method = Image.Quantize.FASTOCTREE if image.mode == "RGBA" else Image.Quantize.MEDIANCUT
+        return image.quantize(colors, method=method)
+    if image.getcolors(256) is None:
+        return image
+
+    array = np.asarray(image)
+    n_channel = array.shape[-1]
+    keys = np.zeros(array.shape[:2], dtype=np.uint32)
+    for channel in range(n_channel):
+        keys = (keys << 8) | array[..., channel]
+    palette_keys, indices = np.unique(keys, return_inverse=True)
+    table = np.stack([(palette_keys >> (8 * (n_channel - 1 - c))) & 0xFF for c in range(n_channel)], axis=1)
+    result = Image.frombytes("P", image.size, indices.reshape(-1).astype(np.uint8).tobytes())
+    result.putpalette(table[:, :3].astype(np.uint8).tobytes())
+    if n_channel == 4:
+        result.info["transparency"] = table[:, 3].astype(np.uint8).tobytes()
+    return result
+
+
+def _to_format(format: str) -> str:
+    format = format.lower()
+    format = {"jpg": "jpeg"}.get(format, format)
+    if format not in PRESETS:
+        raise ValueError(f"`format` must be one of `{list(PRESETS)}`, but `{format}`.")
+    return format
+
+
+def _to_image(image) -> Image.Image:
+    if isinstance(image, Image.Image):
+        return image
+    # `ImageArray` is composed once.
+    composite = getattr(image, "image", None)
+    if isinstance(composite, Image.Image):
+        return composite
+    raise ValueError(f"`{type(image)}` cannot be exported.")
+
+
+if __name__ == "__main__":
+    pass
@@ -1,8 +1,12 @@
 from PIL import Image
-from typing import List, Sequence, Tuple, Callable, Iterator, Union
+from typing import Dict, List, Sequence, Tuple, Callable, Iterator, Union
+import hashlib
 import math
+import os
 import numpy as np
 from fairyimage.color import Color
+from fairyimage.operations import common_mode, to_mode, from_array, shrink
+from fairyimage.loader import is_source, is_tile, size_of, open_image
 
 
 class ImageArray:
@@ -19,11 +23,41 @@ class ImageArray:
     (This is because the specific librarie's functions should be preferred.)
 
     * `size` returns the concatenated size of `Image`, not the total count of `images`.
+    * `size`, `width`, `height` and `mode` are computed from the tiles,
+      and the other attributes of `PIL.Image` (e.g. `save`) compose `image`.
+    * The attributes of `np.ndarray` (e.g. `ndim`) never compose `image`.
+    * Unknown attributes raise `AttributeError`.
+
+    ### Lazy sources.
+    Paths and file objects are also accepted as images.
+    Their sizes are read from the headers, and they are decoded
+    at the reduced scale (`draft`) when possible.
+
+    ### Incremental update.
+    The composed `image` is kept together with the tiles painted on it.
+    When a tile is replaced by `array[i, j] = new_image`,
+    only its region is repainted and recorded as `dirty`.
+
+    ### Indexing.
+    `array[1:3, ::2]`, boolean masks and integer arrays return `ImageArray`
+    which shares the tiles, without resizing.
+    `array[i, j]` returns the tile, and `array[key] = image(s)` replaces the tiles.
+
+    ### Shared tiles.
+    Identical tiles (the same pixels, size and mode) are resized only once,
+    and the same `PIL.Image` is referred from all their positions.
+    `map` is also applied once per unique tile.
+    The given images whose size is already `unit_size` are kept without copy,
+    so the tiles may be the caller's images themselves.
+    Hence, do not modify the tiles in-place.
     """
 
     def __init__(self, images):
         images = self._to_object_array(images)
         self._images = to_same_size(images) 
+        self._composite = None  # The composed `PIL.Image`.
+        self._painted = None  # The tiles which `_composite` reflects.
+        self._dirty = []  # Boxes repainted after the composition.
 
     @property
     def count(self):
@@ -34,25 +68,25 @@ class ImageArray:
     def unit_size(self) -> Tuple[int, int]:
         """The size of one image. 
         """
-        return self._images[0][0].size
+        return self._images.flat[0].size
 
     def _to_object_array(self, images):
         """
         Only one or two dimensions data are accepted.
         """
-        if isinstance(images, Image.Image):
+        if is_tile(images):
             ret = np.empty(1, dtype=object)
             ret[0] = images
             return ret
         elif isinstance(images, Sequence):
-            if isinstance(images[0], Image.Image):
+            if is_tile(images[0]):
                 ret = np.empty(len(images), dtype=object)
                 for i, elem in enumerate(images):
                     ret[i] = elem
                 return ret[..., np.newaxis]
             else:
-                assert isinstance(arg[0][0], Image.Image)
-                assert all(len(elems) == len(arg[0]) for elems in arg)
+                assert is_tile(images[0][0])
+                assert all(len(elems) == len(images[0]) for elems in images)
                 ret = np.empty((len(images), len(images[0])), dtype=object)
                 for i, elems in enumerate(images):
                     for j, elem in enumerate(elems):
@@ -153,65 +187,293 @@ class ImageArray:
         else:
             images = list(self._images.ravel())
             elem_size = images[0].size
-            fill_list = [
-                fill.resize(elem_size) for _ in range(np.prod(shape) - len(images))
-            ]
-            images = [*images, *fill_list]
+            if fill.mode != images[0].mode:
+                fill = fill.convert(images[0].mode)
+            # One resized `fill` is shared by all the empty slots.
+            fill = _to_size(fill, elem_size)
+            images = [*images, *([fill] * (np.prod(shape) - len(images)))]
             return ImageArray(images).reshape(shape, fill=None)
 
         raise RuntimeError("This is a bug.")
 
     def __getattr__(self, key):
-        try:
+        # Private attributes are never forwarded,
+        # since they may be looked up before `__init__` completes.
+        if key.startswith("_"):
+            raise AttributeError(key)
+        # Only the attributes of `PIL.Image` require the composition.
+        if key in _IMAGE_ATTRIBUTES:
             return getattr(self.image, key)
-        except AttributeError:
-            pass
-        try:
+        if hasattr(np.ndarray, key):
             return getattr(self._images, key)
-        except AttributeError:
-            pass
+        raise AttributeError(f"`{type(self).__name__}` object has no attribute `{key}`.")
 
     @property
-    def image(self) -> Image.Image:
-        """Return `PIL.Image` based on the content"""
+    def size(self) -> Tuple[int, int]:
+        """The size of `image`, computed without composing it."""
+        return self.grid_size(width=0)
+
+    @property
+    def width(self) -> int:
+        return self.size[0]
+
+    @property
+    def height(self) -> int:
+        return self.size[1]
+
+    @property
+    def mode(self) -> str:
+        """The mode of `image`, computed without composing it."""
+        if self._composite is not None:
+            # The composed image is widened by the tiles which are not painted yet.
+            pending = [
+                self._images[key] for key in np.ndindex(self.shape) if self._images[key] is not self._painted[key]
+            ]
+            return common_mode([self._composite] + pending) if pending else self._composite.mode
+        return common_mode(self.tiles)
+
+    @classmethod
+    def _from_tiles(cls, tiles: np.ndarray) -> "ImageArray":
+        """Construct from the object array whose tiles have the same size, without `to_same_size`."""
+        instance = cls.__new__(cls)
+        instance._images = tiles
+        instance._composite = None
+        instance._painted = None
+        instance._dirty = []
+        return instance
+
+    def __getitem__(self, key):
+        """Index as `np.ndarray`.
+
+        If `key` specifies one tile, it is returned as `PIL.Image`.
+        Otherwise, `ImageArray` which shares the tiles is returned.
+        Slices, boolean masks and integer arrays are accepted,
+        and the cost is proportional to the number of selected tiles.
+        """
+        if self._is_tile_key(key):
+            return self._images[self._to_index(key)]
+        selected = self._images[key]
+        if not isinstance(selected, np.ndarray):
+            return selected
+        if selected.size == 0:
+            raise IndexError(f"No tiles are selected by `{key}`.")
+        if selected.ndim not in {1, 2}:
+            raise IndexError(f"The dimension must be 1 or 2, but `{selected.ndim}`.")
+        return ImageArray._from_tiles(selected)
+
+    def __setitem__(self, key, images):
+        """Replace the tiles at `key` with `images`.
+
+        `images` is one image, which is placed at all the positions of `key`,
+        or images whose count is equal to the number of the positions.
+        They are resized to `unit_size`.
+        If the composed image exists, only the regions of the replaced tiles are repainted.
+        """
+        if self._is_tile_key(key):
+            index = self._to_index(key)
+            (tile,) = to_same_size([images], size=self.unit_size)
+            self._images[index] = tile
+            if self._composite is not None:
+                self._paint(index)
+            return
+
+        shape = np.shape(self._images[key])
+        if is_tile(images):
+            (tile,) = to_same_size([images], size=self.unit_size)
+            values = _to_objects([tile] * int(np.prod(shape)), shape)
+        else:
+            if isinstance(images, ImageArray):
+                images = images.tiles
+            elif isinstance(images, np.ndarray):
+                images = list(images.ravel())
+            values = to_same_size(_to_objects(list(images), shape), size=self.unit_size)
+        self._images[key] = values
+        if self._composite is not None:
+            self._sync()
+
+    def _is_tile_key(self, key) -> bool:
+        if isinstance(key, (int, np.integer)):
+            key = (key,)
+        return (
+            isinstance(key, tuple)
+            and len(key) == self._images.ndim
+            and all(isinstance(v, (int, np.integer)) for v in key)
+        )
+
+    def _to_index(self, key) -> Tuple[int, ...]:
+        if not self._is_tile_key(key):
+            raise IndexError(f"Only a tile is specified by `key`, `{key}`.")
+        if isinstance(key, (int, np.integer)):
+            key = (key,)
+        for v, n in zip(key, self.shape):
+            if not -n <= v < n:
+                raise IndexError(f"`{key}` is out of `{self.shape}`.")
+        return tuple(int(v) % n for v, n in zip(key, self.shape))
+
+    def tile_box(self, key, grid_width: int = 0) -> Tuple[int, int, int, int]:
+        """Return the region of the tile at `key` in `image`,
+        as `(left, upper, right, lower)`.
+
+        If `grid_width` is given, the region in `grid(width=grid_width)` is returned.
+        """
+        key = self._to_index(key)
+        width, height = self.unit_size
         if self._images.ndim == 1:
-            return _hstack(self._images)
-        elif self._images.ndim == 2:
-            lines = [_hstack(elems) for elems in self._images]
+            (row, column) = (0, key[0])
+        else:
+            (row, column) = key
+        # Each tile is surrounded by `half` and the whole by `half` again.
+        half = grid_width // 2
+        left = column * (width + 2 * half) + 2 * half
+        upper = row * (height + 2 * half) + 2 * half
+        return (left, upper, left + width, upper + height)
+
+    def grid_size(self, width: int = 4) -> Tuple[int, int]:
+        """Return the size of `grid(width=width)` without composing it."""
+        half = width // 2
+        rows, columns = (1, self.shape[0]) if self._images.ndim == 1 else self.shape
+        (u_width, u_height) = self.unit_size
+        return (
+            columns * (u_width + 2 * half) + 2 * half,
+            rows * (u_height + 2 * half) + 2 * half,
+        )
+
+    @property
+    def tiles(self) -> List[Image.Image]:
+        """The list of tiles in row-major order."""
+        return list(self._images.ravel())
+
+    @property
+    def image(self) -> Image.Image:
+        """Return `PIL.Image` based on the content.
+
+        The composed image is kept and updated incrementally,
+        so copy it before modifying it.
+        """
+        if self._composite is None:
+            self._composite = self._compose()
+            self._painted = self._images.copy()
+            self._dirty = []
+        else:
+            self._sync()
+        return self._composite
+
+    def invalidate(self):
+        """Discard the composed `image`, which is composed again when it is required.
+        Use it after modifying the tiles in-place.
+        """
+        self._composite = None
+        self._painted = None
+        self._dirty = []
+
+    def _sync(self):
+        """Repaint the tiles replaced after the composition.
+        (The tiles may be replaced via views which share them.)
+        """
+        for key in np.ndindex(self.shape):
+            if self._images[key] is not self._painted[key]:
+                self._paint(key)
+
+    @property
+    def dirty_boxes(self) -> List[Tuple[int, int, int, int]]:
+        """Boxes of `image` repainted since the last `pop_dirty`."""
+        return list(self._dirty)
+
+    def pop_dirty(self) -> List[Tuple[int, int, int, int]]:
+        """Return `dirty_boxes` and clear them."""
+        boxes, self._dirty = self._dirty, []
+        return boxes
+
+    def _compose(self) -> Image.Image:
+        # Tiles are composed in their narrowest common mode.
+        mode = common_mode(self.tiles)
+        converted = map_unique(lambda tile: to_mode(tile, mode), self.tiles)
+        images = np.empty(self.count, dtype=object)
+        for index, tile in enumerate(converted):
+            images[index] = tile
+        images = images.reshape(self.shape)
+        if images.ndim == 1:
+            return _hstack(images)
+        elif images.ndim == 2:
+            lines = [_hstack(elems) for elems in images]
             return _vstack(lines)
         raise RuntimeError("This is a bug.")
 
+    def _paint(self, key):
+        tile = self._images[key]
+        mode = common_mode([self._composite, tile])
+        if mode != self._composite.mode:
+            # The composed image is widened, so that `tile` is painted without loss.
+            self._composite = self._composite.convert(mode)
+            self._dirty.append((0, 0, *self._composite.size))
+        tile = to_mode(tile, mode)
+        box = self.tile_box(key)
+        self._composite.paste(tile, box[:2])
+        self._painted[key] = self._images[key]
+        self._dirty.append(box)
+
     def map(self, func: Callable[[Image.Image], Image.Image]) -> "ImageArray":
         """Apply `func` to  all the images to `ImageArray`. 
+        `func` is called once per unique tile.
         """
-        images = [func(image) for image in self._images.ravel()]
+        images = map_unique(func, self.tiles)
         return ImageArray(images).reshape(shape=self.shape)
 
     def grid(self,
              color:Color = (0, 0, 0),
              width: int = 4) -> Image.Image:
         """Returns the `grid` image. 
+
+        The lines are painted on one canvas at the tile boundaries,
+        instead of framing each tile.
+        Both the inner and outer lines are `2 * (width // 2)` pixels.
+        The mode is the narrowest one which represents the tiles and `color`.
         """
-        # For reference orderes.
-        from fairyimage import editor
-        def _inner(image):
-            return editor.frame(image, color=color, width=width // 2, inner=False)
-        array = self.map(_inner)
-        return editor.frame(array.image, color=color, width=width // 2, inner=False)
+        if width // 2 == 0:
+            return self.image.copy()
+        mode, fill = _grid_mode(common_mode(self.tiles), Color(color))
+        canvas = Image.new(mode, self.grid_size(width), fill)
+        tiles = map_unique(lambda tile: to_mode(tile, mode), self.tiles)
+        for key, tile in zip(np.ndindex(self.shape), tiles):
+            canvas.paste(tile, self.tile_box(key, grid_width=width)[:2])
+        return canvas
+
+
+# The attributes forwarded to the composed `image`.
+_IMAGE_ATTRIBUTES = frozenset(name for name in dir(Image.new("L", (1, 1))) if not name.startswith("_"))
+
+
+def _grid_mode(mode: str, color: Color):
+    """Return the narrowest mode of `grid` and the value of `color` in it."""
+    is_gray = color.rgb[0] == color.rgb[1] == color.rgb[2]
+    is_opaque = color.rgba[3] == 255
+    if mode in {"1", "L"} and is_gray and is_opaque:
+        return "L", color.rgb[0]
+    if mode in {"1", "L", "LA"} and is_gray:
+        return "LA", (color.rgb[0], color.rgba[3])
+    if mode in {"1", "L", "RGB"} and is_opaque:
+        return "RGB", color.rgb
+    return "RGBA", color.rgba
 
 
 def _hstack(images: List[Image.Image]):
     arrays = [np.array(image) for image in images]
-    return Image.fromarray(np.hstack(arrays))
+    return from_array(np.hstack(arrays), images[0])
 
 
 def _vstack(images: List[Image.Image]):
     arrays = [np.array(image) for image in images]
-    return Image.fromarray(np.vstack(arrays))
+    return from_array(np.vstack(arrays), images[0])
 
 
 def to_same_size(images: Union[Sequence[Image.Image], np.ndarray], size=None) -> List[Image.Image]:
     """Return the images whose size are equal.
+
+    Paths and file objects are also accepted in `images`.
+    For them, `size` is determined from the headers and
+    decoding is performed at the reduced scale if possible.
+    Images whose size is already equal to `size` are returned as they are
+    (not copied), so the result may share the images with `images`.
     """
     if isinstance(images, np.ndarray):
         shape = images.shape
@@ -221,13 +483,115 @@ def to_same_size(images: Union[Sequence[Image.Image], np.ndarray], size=None) ->
             ret[i] = elem
         return ret.reshape(shape)
 
+    # Hashing the pixels of large sources costs as much as resizing them,
+    # so the same objects are resized once, and the contents are compared after resizing.
+    uniques, inverse = unique_tiles(images, by_content=False)
     if size is None:
-        sizes = [image.size for image in images]
-        ratios = [width / height for (width, height) in sizes]
-        ratio = np.median(ratios)
-        height = round(np.max([image.size[1] for image in images]))
-        size = (int(height * ratio), height)
-    return [image.resize(size) for image in images]
+        sizes = [size_of(image) for image in uniques]
+        size = to_unit_size([sizes[index] for index in inverse])
+    converted, c_inverse = unique_tiles([_to_size(image, size) for image in uniques])
+    return [converted[c_inverse[index]] for index in inverse]
+
+
+def to_unit_size(sizes: Sequence[Tuple[int, int]]) -> Tuple[int, int]:
+    """Return the common size used in `to_same_size` from `sizes` alone.
+    """
+    ratios = [width / height for (width, height) in sizes]
+    ratio = np.median(ratios)
+    height = round(np.max([size[1] for size in sizes]))
+    return (int(height * ratio), height)
+
+
+def _to_objects(images: List, shape: Tuple[int, ...]) -> np.ndarray:
+    """Return the object array of `shape` whose elements are `images`."""
+    if len(images) != int(np.prod(shape)):
+        raise ValueError(f"`{len(images)}` images cannot be placed in `{shape}`.")
+    ret = np.empty(len(images), dtype=object)
+    for i, elem in enumerate(images):
+        ret[i] = elem
+    return ret.reshape(shape)
+
+
+def fingerprint(image: Image.Image) -> Tuple:
+    """Return the key which is equal if and only if the images are identical.
+
+    It consists of `mode`, `size`, the palette, `info["transparency"]`
+    and the hash of the pixels.
+    """
+    digest = hashlib.blake2b(image.tobytes(), digest_size=16).digest()
+    palette = bytes(image.getpalette() or []) if image.mode == "P" else b""
+    transparency = image.info.get("transparency")
+    if isinstance(transparency, list):
+        transparency = tuple(transparency)
+    return (image.mode, image.size, palette, transparency, digest)
+
+
+def unique_tiles(images: Sequence, by_content: bool = True) -> Tuple[List, List[int]]:
+    """Return the unique tiles of `images` and the index of each element in them.
+
+    The candidates are found by the cheap key (mode, size and sampled pixels) first,
+    and `fingerprint` is computed only for them.
+    If `by_content` is False, only the same objects are unified.
+    Paths are identified by their names, and file objects by themselves.
+    """
+    uniques: List = []
+    inverse: List[int] = []
+    by_id: Dict[int, int] = dict()
+    by_key: Dict[Tuple, List[int]] = dict()
+    prints: Dict[int, Tuple] = dict()
+
+    def _print(index):
+        if index not in prints:
+            prints[index] = fingerprint(uniques[index])
+        return prints[index]
+
+    for image in images:
+        index = by_id.get(id(image))
+        if index is None:
+            key = _cheap_key(image) if by_content or is_source(image) else ("id", id(image))
+            candidates = by_key.setdefault(key, [])
+            if candidates and is_source(image):
+                index = candidates[0]
+            elif candidates:
+                target = fingerprint(image)
+                index = next((c for c in candidates if _print(c) == target), None)
+                if index is None:
+                    prints[len(uniques)] = target
+            if index is None:
+                index = len(uniques)
+                uniques.append(image)
+                candidates.append(index)
+            by_id[id(image)] = index
+        inverse.append(index)
+    return uniques, inverse
+
+
+def _cheap_key(image) -> Tuple:
+    if is_source(image):
+        if isinstance(image, (str, os.PathLike)):
+            return ("path", os.path.abspath(image))
+        return ("file", id(image))
+    sample = image.resize((4, 4), Image.NEAREST).tobytes()
+    return (image.mode, image.size, sample)
+
+
+def map_unique(func: Callable, images: Sequence) -> List:
+    """Return `[func(image) for image in images]`, calling `func` once per the same object."""
+    results: Dict[int, object] = dict()
+    converted = []
+    for image in images:
+        if id(image) not in results:
+            results[id(image)] = func(image)
+        converted.append(results[id(image)])
+    return converted
+
+
+def _to_size(image, size) -> Image.Image:
+    if is_source(image):
+        return open_image(image, size)
+    if image.size == tuple(size):
+        return image
+    return shrink(image, size)
 
 
 
@@ -0,0 +1,138 @@
+"""Planning of the tile layout only from the sizes of images.
+
+`Layout` does not touch pixels while it is planned,
+hence it can be reused for many batches of images whose sizes are the same.
+
+Example
+---------
+layout = plan_layout([image.size for image in images])
+for batch in batches:
+    image = layout.apply(batch).image
+
+"""
+
+import math
+from typing import Sequence, Tuple, Optional
+
+from PIL import Image
+import numpy as np
+
+from fairyimage.image_array import ImageArray, to_same_size, to_unit_size
+
+
+class Layout:
+    """The layout of tiles.
+
+    * `unit_size`: the size of one tile.
+    * `shape`: the number of rows and columns.
+    * `count`: the number of images, which may be smaller than `prod(shape)`.
+      The remainder slots are filled with blank tiles.
+    """
+
+    def __init__(self, unit_size: Tuple[int, int], shape: Tuple[int, int], count: int):
+        if shape[0] * shape[1] < count:
+            raise ValueError(f"`shape`, `{shape}` is too small for `{count}` images.")
+        self.unit_size = tuple(unit_size)
+        self.shape = tuple(shape)
+        self.count = count
+
+    @property
+    def n_fill(self) -> int:
+        """The number of blank tiles."""
+        return self.shape[0] * self.shape[1] - self.count
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """The size of the composed image."""
+        return (self.unit_size[0] * self.shape[1], self.unit_size[1] * self.shape[0])
+
+    def apply(self, images: Sequence[Image.Image], fill=True) -> ImageArray:
+        """Return `ImageArray` of `images` following to this layout.
+
+        Args:
+            fill: the image used for the blank tiles. (See `ImageArray.reshape`.)
+        """
+        images = list(images)
+        if len(images) != self.count:
+            raise ValueError(f"`{self.count}` images are expected, but `{len(images)}`.")
+        images = to_same_size(images, size=self.unit_size)
+        array = ImageArray(images)
+        if self.n_fill:
+            return array.reshape(self.shape, fill=fill)
+        return array.reshape(self.shape)
+
+    def __repr__(self):
+        return f"Layout(unit_size={self.unit_size}, shape={self.shape}, count={self.count})"
+
+
+def plan_layout(
+    sizes: Sequence[Tuple[int, int]],
+    shape: Optional[Tuple[int, int]] = None,
+    unit_size: Optional[Tuple[int, int]] = None,
+    fill: bool = False,
+) -> Layout:
+    """Plan `Layout` from `sizes` of images.
+
+    Args:
+        sizes: the sizes of images.
+        shape: If given, it is used. `-1` is also accepted for one axis.
+        unit_size: If not given, the same rule as `to_same_size` is used.
+        fill: If True, the shapes whose product is larger than the count are also considered.
+    """
+    count = len(sizes)
+    if count == 0:
+        raise ValueError("Empty `sizes` is not accepted.")
+    if unit_size is None:
+        unit_size = to_unit_size(sizes)
+    if shape is None:
+        shape = plan_shape(count, unit_size, fill=fill)
+    else:
+        shape = _solve_shape(shape, count)
+    if not fill and shape[0] * shape[1] != count:
+        raise ValueError(f"`shape`, `{shape}` does not match with `{count}` without `fill`.")
+    return Layout(unit_size, shape, count)
+
+
+def plan_shape(count: int, unit_size: Tuple[int, int], fill: bool = False) -> Tuple[int, int]:
+    """Return `(row, column)` so that the composed image becomes square-like.
+
+    If `fill` is False, only the divisors of `count` are considered as `row`.
+    If True, `column = ceil(count / row)` is also considered,
+    as long as no row becomes completely blank.
+    """
+    (u_width, u_height) = unit_size
+    # (u_width * column) is similar to (u_height * row).
+    r_float = np.sqrt(count * u_width / u_height)
+    if not fill:
+        divisions = [n for n in range(1, count + 1) if count % n == 0]
+        row = int(min(divisions, key=lambda r: abs(r - r_float)))
+        return (row, count // row)
+
+    def _cost(row):
+        column = math.ceil(count / row)
+        aspect = abs(math.log((u_width * column) / (u_height * row)))
+        return (aspect, row * column - count)
+
+    rows = [r for r in range(1, count + 1) if (r - 1) * math.ceil(count / r) < count]
+    row = min(rows, key=_cost)
+    return (row, math.ceil(count / row))
+
+
+def _solve_shape(shape, count) -> Tuple[int, int]:
+    if isinstance(shape, int):
+        shape = (shape, shape)
+    shape = list(shape)
+    if len(shape) == 1:
+        shape = [shape[0], 1]
+    if len(shape) != 2:
+        raise ValueError(f"`len(shape)` must be 1 or 2, but `{len(shape)}`")
+    if shape.count(-1) == 2:
+        raise ValueError("All the value of `shape` is -1.")
+    if -1 in shape:
+        mi = shape.index(-1)
+        shape[mi] = math.ceil(count / shape[1 - mi])
+    return (shape[0], shape[1])
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,81 @@
+"""Lazy loading of image sources.
+
+`ImageArray` and `thumbnail` accept not only `PIL.Image`,
+but also paths and file objects, which are called `source` here.
+
+* The size of `source` is determined only from the header.
+* The pixels are decoded only when the target size is known,
+  so that `JPEG` can be decoded at the reduced scale via `draft`.
+
+"""
+
+import os
+from typing import Tuple, Union, BinaryIO, Optional
+from PIL import Image
+
+from fairyimage.operations import shrink
+
+Source = Union[str, os.PathLike, BinaryIO]
+
+
+def is_source(arg) -> bool:
+    """Return whether `arg` is a path or a file object of an image."""
+    if isinstance(arg, Image.Image):
+        return False
+    return isinstance(arg, (str, os.PathLike)) or hasattr(arg, "read")
+
+
+def is_tile(arg) -> bool:
+    """Return whether `arg` can be an element of `ImageArray`."""
+    return isinstance(arg, Image.Image) or is_source(arg)
+
+
+def peek_size(source: Source) -> Tuple[int, int]:
+    """Return the size of `source` reading only its header."""
+    position = _tell(source)
+    with Image.open(source) as image:
+        size = image.size
+    _seek(source, position)
+    return size
+
+
+def size_of(arg) -> Tuple[int, int]:
+    """Return the size of `PIL.Image` or `source` without decoding."""
+    if is_source(arg):
+        return peek_size(arg)
+    return arg.size
+
+
+def open_image(source: Source, size: Optional[Tuple[int, int]] = None) -> Image.Image:
+    """Decode `source` into `PIL.Image`.
+
+    Args:
+        size: If given, the returned image is resized to `size`.
+              For `JPEG`, decoding is performed at the reduced scale,
+              which is equal to or larger than `size`.
+    """
+    position = _tell(source)
+    image = Image.open(source)
+    if size is not None and size != image.size:
+        # `draft` is ignored except for the formats which support it.
+        image.draft(image.mode, size)
+    image.load()
+    _seek(source, position)
+    if size is not None and size != image.size:
+        image = shrink(image, size)
+    return image
+
+
+def _tell(source):
+    if hasattr(source, "tell"):
+        return source.tell()
+    return None
+
+
+def _seek(source, position):
+    if position is not None:
+        source.seek(position)
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,178 @@
+"""Export of `ImageArray` as a tiled pyramid of Deep Zoom (`DZI`).
+
+For huge mosaics, one giant image is hard to open.
+`write_dzi` writes the multi-resolution tiles instead, which viewers
+such as `OpenSeadragon` load on demand.
+
+* The tiles of the highest level are painted directly from the tiles of `ImageArray`
+  with their geometry (`tile_box`), so the whole canvas is never allocated.
+* Each lower level is made from the 2x2 tiles of the level above, row by row,
+  so only a few rows of tiles are kept in memory per level.
+
+Layout
+---------
+out.dzi
+out_files/{level}/{column}_{row}.png
+"""
+
+import math
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from PIL import Image
+
+from fairyimage.color import Color
+from fairyimage.image_array import ImageArray, _grid_mode
+from fairyimage.operations import common_mode, to_mode
+
+_DZI_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" TileSize="{tile_size}" Overlap="0" Format="{format}">
+  <Size Width="{width}" Height="{height}"/>
+</Image>
+"""
+
+
+def write_dzi(
+    images: Union[ImageArray, List[Image.Image]],
+    path: Union[str, Path],
+    tile_size: int = 256,
+    grid_color: Color = (0, 0, 0),
+    grid_width: int = 0,
+    format: str = "png",
+) -> Path:
+    """Write the pyramid of `images.grid(grid_color, grid_width)` as `DZI`.
+
+    Args:
+        path: The path of `.dzi` file. The tiles are written to `{stem}_files`.
+        tile_size: The size of square tiles.
+        format: "png" or "jpg".
+    Return:
+        The path of `.dzi` file.
+    """
+    if not isinstance(images, ImageArray):
+        images = ImageArray(images)
+    path = Path(path).with_suffix(".dzi")
+    folder = path.with_name(f"{path.stem}_files")
+    size = images.grid_size(grid_width)
+    tiles = images.tiles
+    mode, fill = _grid_mode(common_mode(tiles), Color(grid_color))
+    if format in {"jpg", "jpeg"}:
+        mode, fill = _grid_mode("RGB", Color(Color(grid_color).rgb))
+
+    max_level = math.ceil(math.log2(max(size))) if max(size) > 1 else 0
+    writer = _LevelWriter(folder, max_level, tile_size, format)
+    n_columns = math.ceil(size[0] / tile_size)
+    n_rows = math.ceil(size[1] / tile_size)
+    for row in range(n_rows):
+        upper = row * tile_size
+        lower = min(upper + tile_size, size[1])
+        regions = []
+        for column in range(n_columns):
+            left = column * tile_size
+            right = min(left + tile_size, size[0])
+            box = (left, upper, right, lower)
+            regions.append(_render_region(images, tiles, box, mode, fill, grid_width))
+        writer.add_row(regions)
+    writer.close()
+
+    path.write_text(
+        _DZI_TEMPLATE.format(tile_size=tile_size, format=format, width=size[0], height=size[1]),
+        encoding="utf8",
+    )
+    return path
+
+
+def _render_region(
+    images: ImageArray,
+    tiles: List[Image.Image],
+    box: Tuple[int, int, int, int],
+    mode: str,
+    fill,
+    grid_width: int,
+) -> Image.Image:
+    """Paint the region `box` of `images.grid` from `tiles` which intersect it.
+    `tiles` are `images.tiles`.
+    """
+    half = grid_width // 2
+    (u_width, u_height) = images.unit_size
+    ndim = len(images.shape)
+    rows, columns = (1, images.shape[0]) if ndim == 1 else images.shape
+
+    def _range(start, end, unit, count):
+        pitch = unit + 2 * half
+        first = max(0, (start - 2 * half) // pitch)
+        last = min(count - 1, (end - 1 - 2 * half) // pitch)
+        return range(first, last + 1)
+
+    canvas = Image.new(mode, (box[2] - box[0], box[3] - box[1]), fill)
+    for row in _range(box[1], box[3], u_height, rows):
+        for column in _range(box[0], box[2], u_width, columns):
+            key = (column,) if ndim == 1 else (row, column)
+            (left, upper, right, lower) = images.tile_box(key, grid_width=grid_width)
+            if right <= box[0] or box[2] <= left or lower <= box[1] or box[3] <= upper:
+                continue
+            tile = to_mode(tiles[row * columns + column], mode)
+            canvas.paste(tile, (left - box[0], upper - box[1]))
+    return canvas
+
+
+class _LevelWriter:
+    """Write the rows of tiles at `level`, and feed the halved rows to `level - 1`."""
+
+    def __init__(self, folder: Path, level: int, tile_size: int, format: str):
+        self.folder = folder / str(level)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.level = level
+        self.tile_size = tile_size
+        self.format = format
+        self._n_row = 0
+        self._pending: Optional[List[Image.Image]] = None
+        self._parent: Optional[_LevelWriter] = None
+        if level > 0:
+            self._parent = _LevelWriter(folder, level - 1, tile_size, format)
+
+    def add_row(self, tiles: List[Image.Image]):
+        for column, tile in enumerate(tiles):
+            tile.save(self.folder / f"{column}_{self._n_row}.{self.format}")
+        self._n_row += 1
+        if self._parent is None:
+            return
+        if self._pending is None:
+            self._pending = tiles
+        else:
+            self._parent.add_row(_halve_rows(self._pending, tiles))
+            self._pending = None
+
+    def close(self):
+        if self._parent is None:
+            return
+        if self._pending is not None:
+            self._parent.add_row(_halve_rows(self._pending, None))
+            self._pending = None
+        self._parent.close()
+
+
+def _halve_rows(upper: List[Image.Image], lower: Optional[List[Image.Image]]) -> List[Image.Image]:
+    """Combine 2x2 tiles of two rows, and reduce them by half."""
+    result = []
+    for column in range(0, len(upper), 2):
+        block = [upper[column : column + 2]]
+        if lower is not None:
+            block.append(lower[column : column + 2])
+        width = sum(tile.width for tile in block[0])
+        height = sum(row[0].height for row in block)
+        canvas = Image.new(upper[0].mode, (width, height))
+        y = 0
+        for row in block:
+            x = 0
+            for tile in row:
+                canvas.paste(tile, (x, y))
+                x += tile.width
+            y += row[0].height
+        # Odd sizes are rounded up, which is consistent with the sizes of levels.
+        result.append(canvas.reduce(2))
+    return result
+
+
+if __name__ == "__main__":
+    pass
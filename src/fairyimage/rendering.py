@@ -0,0 +1,178 @@
+"""Rasterization of `matplotlib` objects without `PNG` round trip.
+
+The figure is drawn on `Agg` canvas, and `canvas.buffer_rgba()`
+is wrapped as `PIL.Image` directly.
+Cropping of the tight bounding box is performed on the buffer,
+hence the pixels are copied only once.
+
+`pooled_figure` lends a cleared `Figure` from the thread-local pool,
+so that repeated renderings of texts do not construct figures every time.
+
+"""
+
+import contextlib
+import math
+import threading
+from typing import Iterable, Iterator, Optional, Tuple, Union
+
+import matplotlib
+from PIL import Image
+from matplotlib.artist import Artist
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.transforms import Bbox
+
+
+def is_rasterizable(figure: Figure) -> bool:
+    """Return whether `figure` can be handled in this module."""
+    return isinstance(figure.canvas, FigureCanvasAgg)
+
+
+def draw(figure: Figure) -> Image.Image:
+    """Draw `figure`, and return the view of its buffer.
+
+    Notice that the returned image shares the buffer of the canvas,
+    so it becomes invalid when `figure` is drawn again.
+    """
+    canvas = figure.canvas
+    canvas.draw()
+    buffer = canvas.buffer_rgba()
+    width, height = canvas.get_width_height(physical=True)
+    return Image.frombuffer("RGBA", (width, height), buffer, "raw", "RGBA", 0, 1)
+
+
+def figure_to_image(figure: Figure, dpi: Optional[float] = None) -> Image.Image:
+    """Convert `figure` to `PIL.Image.Image`."""
+    with _dpi(figure, dpi):
+        return draw(figure).copy()
+
+
+def axes_to_image(axes: Axes, is_tight: bool = True, dpi: Optional[float] = None) -> Image.Image:
+    """Convert `axes` to `PIL.Image.Image`.
+    If `is_tight`, the decorations (labels, title...) are included.
+    """
+    figure = _root_figure(axes)
+    with _dpi(figure, dpi):
+        view = draw(figure)
+        renderer = figure.canvas.get_renderer()
+        if is_tight:
+            bbox = axes.get_tightbbox(renderer)
+        else:
+            bbox = axes.get_window_extent(renderer)
+        return view.crop(to_box(bbox, view.size))
+
+
+def artists_to_image(
+    artists: Union[Artist, Iterable[Artist]], is_tight: bool = True, dpi: Optional[float] = None
+) -> Image.Image:
+    """Convert `artists` to `PIL.Image.Image`.
+
+    The region is the union of bounding boxes of `artists`.
+    If `is_tight`, the transparent margin is also removed.
+    """
+    if isinstance(artists, Artist):
+        artists = [artists]
+    artists = list(artists)
+    figure = _root_figure(artists[0])
+    with _dpi(figure, dpi):
+        view = draw(figure)
+        renderer = figure.canvas.get_renderer()
+        bbox = Bbox.union([artist.get_window_extent(renderer) for artist in artists])
+        image = view.crop(to_box(bbox, view.size))
+    if is_tight:
+        alpha_bbox = image.getchannel("A").getbbox()
+        if alpha_bbox:
+            image = image.crop(alpha_bbox)
+    return image
+
+
+def to_box(bbox: Bbox, size: Tuple[int, int]) -> Tuple[int, int, int, int]:
+    """Convert `bbox` in display coordinates into the box of `PIL`,
+    clipped by `size`.
+    """
+    width, height = size
+    left = min(max(0, math.floor(bbox.x0)), width)
+    right = min(max(0, math.ceil(bbox.x1)), width)
+    upper = min(max(0, math.floor(height - bbox.y1)), height)
+    lower = min(max(0, math.ceil(height - bbox.y0)), height)
+    return (left, upper, max(left, right), max(upper, lower))
+
+
+# The maximum number of idle figures kept per thread.
+POOL_SIZE = 4
+
+_local = threading.local()
+
+
+@contextlib.contextmanager
+def pooled_figure(dpi: Optional[float] = None) -> Iterator[Figure]:
+    """Lend a cleared `Figure` of the thread-local pool.
+
+    The figure is not registered to `pyplot`, hence `plt.close` is not required,
+    and it must not be used after `with` block.
+    `dpi`, size and the background are reset to the defaults of `rcParams`.
+
+    Example
+    ----------
+    with pooled_figure() as fig:
+        text = fig.text(0, 0, "hoge")
+        image = artists_to_image(text)
+    """
+    pool = _get_pool()
+    figure = pool.pop() if pool else _new_figure()
+    _reset_figure(figure, dpi)
+    try:
+        yield figure
+    finally:
+        figure.clear()
+        if len(pool) < POOL_SIZE:
+            pool.append(figure)
+
+
+def _get_pool():
+    if not hasattr(_local, "figures"):
+        _local.figures = []
+    return _local.figures
+
+
+def _new_figure() -> Figure:
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    return figure
+
+
+def _reset_figure(figure: Figure, dpi: Optional[float]):
+    rc = matplotlib.rcParams
+    figure.clear()
+    figure.set_dpi(rc["figure.dpi"] if dpi is None else dpi)
+    figure.set_size_inches(rc["figure.figsize"])
+    figure.patch.set_alpha(None)
+    figure.patch.set_facecolor(rc["figure.facecolor"])
+
+
+def _root_figure(artist: Artist) -> Figure:
+    # `SubFigure.figure` is the root `Figure`, and `Figure.figure` is itself.
+    return artist.figure.figure
+
+
+class _dpi:
+    """Temporarily change `dpi` of `figure`."""
+
+    def __init__(self, figure: Figure, dpi: Optional[float]):
+        self.figure = figure
+        self.dpi = dpi
+        self.original = figure.dpi
+
+    def __enter__(self):
+        if self.dpi is not None:
+            self.figure.set_dpi(self.dpi)
+        return self.figure
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.dpi is not None:
+            self.figure.set_dpi(self.original)
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,33 @@
+import json
+
+import pytest
+import numpy as np
+from PIL import Image
+import fairyimage as fi
+
+
+def test_make_atlas(tmp_path):
+    """Images are packed without resizing, and the index is written."""
+    rng = np.random.default_rng(0)
+    images = {
+        f"icon{index}": Image.new("RGBA", tuple(rng.integers(8, 40, size=2)), (index, 0, 0, 255))
+        for index in range(20)
+    }
+    atlas = fi.make_atlas(images, padding=1)
+    assert set(atlas.boxes) == set(images)
+    for name, image in images.items():
+        assert atlas.crop(name).tobytes() == image.tobytes()
+    area = sum(image.width * image.height for image in images.values())
+    assert area / (atlas.image.width * atlas.image.height) > 0.5
+
+    image_path, json_path = atlas.save(tmp_path / "icons")
+    index = json.loads(json_path.read_text())
+    assert index["size"] == list(Image.open(image_path).size)
+    assert index["frames"]["icon3"][2:] == list(images["icon3"].size)
+
+    with pytest.raises(ValueError):
+        fi.make_atlas(images, width=10)
+
+
+if __name__ == "__main__":
+    pytest.main(["--capture=no"])
@@ -0,0 +1,62 @@
+import os
+import time
+
+import pytest
+from PIL import Image
+import fairyimage as fi
+from fairyimage.cache import RenderCache, make_key
+
+
+def test_render_cache(tmp_path):
+    """Renderings are shared via the folder."""
+    try:
+        cache = fi.cache.configure(tmp_path)
+        first = fi.make_str("hoge", fontsize=12)
+        second = fi.make_str("hoge", fontsize=12)
+        assert first.tobytes() == second.tobytes()
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["files"] == 1
+
+        # Another process (here, another instance) reads the same file.
+        other = RenderCache(tmp_path)
+        assert other.get(fi.make_str.cache_key("hoge", fontsize=12)) is not None
+        # The key is independent of the forms of arguments.
+        assert fi.make_str.cache_key("hoge", 12) == fi.make_str.cache_key(s="hoge", fontsize=12)
+
+        # The paths of files are not cached, since the contents may be modified.
+        path = tmp_path / "script.py"
+        path.write_text("x = 1\n")
+        assert fi.conversion.from_source.cache_key(str(path)) is None
+        assert fi.conversion.from_source.cache_key("x = 1\n") is not None
+        # The calls which do not return an image bypass the cache without lookups.
+        assert fi.conversion.from_source.cache_key("x = 1\n", vector=True) is None
+        assert fi.conversion.from_source.cache_key("x = 1\n", n_image=2) is None
+    finally:
+        fi.cache.configure(None)
+    assert fi.cache.get_cache() is None
+
+
+def test_evict(tmp_path, monkeypatch):
+    cache = RenderCache(tmp_path, max_bytes=10 ** 9, max_age=60)
+    for index in range(4):
+        cache.put(make_key("test", index), Image.new("RGB", (32, 32), (index, 0, 0)))
+    old = cache._to_path(make_key("test", 0))
+    os.utime(old, (time.time() - 3600, time.time() - 3600))
+    assert cache.evict() == 1
+    assert cache.get(make_key("test", 0)) is None
+
+    cache.max_bytes = 0
+    assert cache.evict() == 3
+    assert cache.stats()["files"] == 0
+
+    # Unstable arguments are not cached.
+    assert make_key("test", object()) is None
+
+    # The keys depend on the versions of the rendering libraries.
+    key = make_key("test", 0)
+    monkeypatch.setattr(fi.cache, "_LIBRARY_VERSIONS", ("0.0", "0.0", "0.0"))
+    assert make_key("test", 0) != key
+
+
+if __name__ == "__main__":
+    pytest.main(["--capture=no"])
@@ -0,0 +1,55 @@
+import pytest
+from PIL import Image
+import numpy as np
+import fairyimage as fi
+
+
+def _gen_word_to_image(count=7):
+    return {
+        f"w{index}": Image.new("RGB", size=(32 + 4 * index, 24), color=(index, 0, 0))
+        for index in range(count)
+    }
+
+
+def test_layout():
+    """`Captioner`'s layout modes.
+    Focus on the size of images.
+    """
+    word_to_image = _gen_word_to_image()
+    row = fi.Captioner(fontsize=12)(word_to_image)
+
+    flow = fi.Captioner(fontsize=12, layout="flow", width=150)(word_to_image)
+    assert flow.width <= 150
+    assert flow.height > row.height
+
+    grid = fi.Captioner(fontsize=12, layout="grid", shape=(2, 4))(word_to_image)
+    assert grid.height < flow.height * 2
+
+    with pytest.raises(ValueError):
+        fi.Captioner(layout="unknown")(word_to_image)
+
+
+def test_stream(tmp_path):
+    """When `path` is given, the image is streamed into `PNG`."""
+    word_to_image = _gen_word_to_image()
+    for layout in ["row", "flow", "grid"]:
+        captioner = fi.Captioner(fontsize=12, layout=layout, width=150)
+        path = tmp_path / f"{layout}.png"
+        assert captioner(word_to_image, path=path) == path
+        with Image.open(path) as image:
+            expected = captioner(word_to_image)
+            assert np.array_equal(np.array(image), np.array(expected))
+
+    # The compression is selected by `preset`.
+    captioner = fi.Captioner(fontsize=12)
+    for preset in ["fast", "small"]:
+        path = tmp_path / f"{preset}.png"
+        captioner(word_to_image, path=path, preset=preset)
+        with Image.open(path) as image:
+            assert np.array_equal(np.array(image), np.array(captioner(word_to_image)))
+    with pytest.raises(ValueError):
+        captioner(word_to_image, path=tmp_path / "unknown.png", preset="unknown")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "--capture=no"])
@@ -0,0 +1,44 @@
+import pickle
+import pytest
+import numpy as np
+from fairyimage import Color, ColorArray
+
+
+def test_color():
+    """`Color` is immutable, hashable and interned."""
+    assert Color("#FF0000") == Color((255, 0, 0))
+    # The values which `Color` accepts are compared as colors.
+    assert Color((255, 0, 0)) == (255, 0, 0) and Color((255, 0, 0)) == "#FF0000"
+    assert Color((255, 0, 0)) != (0, 0, 0) and Color((255, 0, 0)) != object()
+    assert hash(Color((255, 0, 0))) == hash(Color((255, 0, 0)).rgba)
+    assert Color((255, 0, 0)) is Color((255, 0, 0))
+    assert Color(Color((0, 255, 0))) is Color((0, 255, 0))
+    assert Color(0x0000FF).rgb == (255, 0, 0)
+    assert len({Color((255, 0, 0)), Color("#ff0000"), Color((0, 0, 0))}) == 2
+    assert Color((0, 0, 0, 0.5)).rgba == (0, 0, 0, 128)
+    assert pickle.loads(pickle.dumps(Color((1, 2, 3)))) == Color((1, 2, 3))
+
+    with pytest.raises(AttributeError):
+        Color((0, 0, 0))._rgb = (1, 1, 1)
+
+    # The interned instances are bounded, and the recent ones are kept.
+    for value in range(Color._cache_limit + 10):
+        Color(value)
+    assert len(Color._cache) == Color._cache_limit
+    assert Color(Color._cache_limit + 9) is Color(Color._cache_limit + 9)
+
+
+def test_color_array():
+    """`ColorArray` parses the colors at once, following to `Color`."""
+    colors = ["#FF0000", "#00FF0080", 0x0000FF, (0.5, 0.5, 0.5), (10, 20, 30, 0.5), Color((1, 2, 3))]
+    array = ColorArray(colors)
+    assert array.array.shape == (len(colors), 4)
+    assert array.array.dtype == np.uint8
+    for color, row in zip(colors, array.array):
+        assert Color(color).rgba == tuple(row)
+    assert array[1] == Color("#00FF0080")
+    assert len(array[1:3]) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "--capture=no"])
@@ -34,6 +34,184 @@ def test_from_matplotlib():
     assert isinstance(image, Image.Image)
 
 
+def test_rendering():
+    """The buffer of `Agg` canvas is used without `PNG` round trip."""
+    import matplotlib.pyplot as plt
+    from fairyimage import rendering
+    fig, ax = plt.subplots(dpi=100)
+    text = ax.text(0.5, 0.5, "hoge")
+    assert rendering.figure_to_image(fig).size == (640, 480)
+    assert rendering.figure_to_image(fig, dpi=50).size == (320, 240)
+    assert fig.dpi == 100
+    whole = rendering.axes_to_image(ax)
+    part = rendering.artists_to_image(text)
+    assert part.size[0] < whole.size[0] and part.size[1] < whole.size[1]
+    plt.close(fig)
+
+    # Figures of the pool are reused.
+    with rendering.pooled_figure(dpi=50) as fig:
+        assert fig.dpi == 50
+        fig.text(0, 0, "hoge")
+    with rendering.pooled_figure() as other:
+        assert other is fig
+        assert other.dpi == plt.rcParams["figure.dpi"] and not other.texts
+
+
+def test_mathtext():
+    """`mathtext` is used for simple formulas."""
+    from fairyimage.conversion import latex
+    image = conversion.from_latex(r"$\frac{1}{2} + x^2$", method="auto", fontsize=24)
+    assert image.mode == "RGBA"
+    assert image is not latex.via_mathtext(r"\frac{1}{2} + x^2", fontsize=24)
+    assert latex.via_mathtext("x", color=(255, 0, 0)).getpixel((0, 0))[:3] == (255, 0, 0)
+    assert latex.is_formula("$x$") and not latex.is_formula("$x$ and $y$")
+    with pytest.raises(ValueError):
+        conversion.from_latex(r"$\unknowncommand$", method="mathtext")
+
+
+def test_tokens():
+    """The tokens are lexed once and reused by formatters."""
+    import pygments
+    from pygments.formatters import HtmlFormatter
+    from pygments.lexers import PythonLexer
+    from fairyimage.conversion.tokens import TokenCache
+
+    cache = TokenCache()
+    source = "def func(x):\n    return x * 2\n"
+    tokens = cache.get_tokens(source, PythonLexer())
+    assert cache.get_tokens(source, PythonLexer()) is tokens
+    assert cache.cache_info()["hits"] == 1
+    for style in ["default", "monokai"]:
+        formatter = HtmlFormatter(style=style)
+        assert pygments.format(tokens, formatter) == pygments.highlight(source, PythonLexer(), formatter)
+
+
+class _DefaultFontManager:
+    # For `pygments.formatters.img`, so that the system fonts are not required.
+    def __init__(self, font_name, font_size=14):
+        from PIL import ImageFont
+        self.font = ImageFont.load_default()
+
+    def get_char_size(self):
+        return self.get_text_size("M")
+
+    def get_text_size(self, text):
+        return self.font.getbbox(text)[2:]
+
+    def get_font(self, bold, oblique):
+        return self.font
+
+
+def test_incremental(monkeypatch):
+    """Only the edited lines are re-rendered, and the result equals the full rendering."""
+    import io
+    import pygments
+    from pygments.formatters import img
+    from pygments.lexers import PythonLexer
+    from fairyimage.conversion.incremental import IncrementalRenderer
+
+    monkeypatch.setattr(img, "FontManager", _DefaultFontManager)
+
+    def _full(source):
+        data = pygments.highlight(source, PythonLexer(), img.ImageFormatter(line_numbers=True))
+        return Image.open(io.BytesIO(data)).convert("RGB")
+
+    renderer = IncrementalRenderer(PythonLexer(), formatter=img.ImageFormatter(line_numbers=True))
+    lines = [f"def func{i}(x):\n    return x * {i}\n" for i in range(20)]
+    versions = ["".join(lines)]
+    versions.append(versions[-1].replace("x * 7", "x + 7"))
+    versions.append(versions[-1].replace("def func3", '"""\ndef func3'))
+    versions.append(versions[-1].replace('"""\n', ""))
+    dirties = []
+    for version in versions:
+        image = renderer.update(version)
+        assert image.size == _full(version).size
+        assert image.tobytes() == _full(version).tobytes()
+        dirties.append(renderer.pop_dirty())
+    # Only the edited line is repainted.
+    assert len(dirties[1]) == 1
+
+    # The closing quotes turn the previous lines into a docstring.
+    renderer = IncrementalRenderer(PythonLexer(), formatter=img.ImageFormatter(style="colorful"))
+    for version in ['"""\ndoc\nx = 1\n', '"""\ndoc\n"""\nx = 1\n']:
+        image = renderer.update(version)
+        data = pygments.highlight(version, PythonLexer(), img.ImageFormatter(style="colorful"))
+        assert image.tobytes() == Image.open(io.BytesIO(data)).convert("RGB").tobytes()
+
+
+def test_incremental_relex(monkeypatch):
+    """For random edits, the tokens are equal to those of the whole lexing."""
+    import random
+    from pygments.formatters import img
+    from pygments.lexers import DiffLexer, PythonLexer
+    from fairyimage.conversion import incremental
+
+    monkeypatch.setattr(img, "FontManager", _DefaultFontManager)
+    assert incremental.line_reach(DiffLexer()) == 1
+    assert incremental.line_reach(PythonLexer()) == float("inf")
+
+    rng = random.Random(0)
+    diff = "".join(f"--- a/f{i}\n+++ b/f{i}\n@@ -1 +1 @@\n-old {i}\n+new {i}\n" for i in range(10))
+    python = "".join(f'def f{i}(x):\n    """doc"""\n    return x * {i}\n' for i in range(10))
+    for lexer, source, alphabet in [(DiffLexer(), diff, "-+@ \nab"), (PythonLexer(), python, "\"'#\nx ")]:
+        renderer = incremental.IncrementalRenderer(lexer, formatter=img.ImageFormatter())
+        for _ in range(100):
+            renderer.update(source)
+            expected = incremental._split_lines(lexer.get_tokens(source), len(renderer._lines))
+            assert renderer._tokens == expected
+            pos = rng.randrange(len(source) + 1)
+            inserted = "".join(rng.choice(alphabet) for _ in range(rng.randrange(4)))
+            source = source[:pos] + inserted + source[pos + rng.randrange(3) :]
+
+
+def test_svg(monkeypatch):
+    """`SVG` has the same layout as the raster image."""
+    import io
+    import pygments
+    import xml.etree.ElementTree as ET
+    from pygments.formatters import img
+    from pygments.lexers import PythonLexer
+    from fairyimage.conversion import svg
+
+    monkeypatch.setattr(img, "FontManager", _DefaultFontManager)
+    source = "def func(x):\n    return x < 2  # & more\n"
+    formatter = img.ImageFormatter(line_numbers=True, hl_lines=[2])
+    text = svg.format_svg(PythonLexer().get_tokens(source), formatter)
+    root = ET.fromstring(text)
+    data = pygments.highlight(source, PythonLexer(), img.ImageFormatter(line_numbers=True))
+    assert Image.open(io.BytesIO(data)).size == (int(root.get("width")), int(root.get("height")))
+    texts = [elem.text for elem in root if elem.tag.endswith("text")]
+    assert "".join(texts).startswith(source.replace("\n", ""))
+    assert len(texts) == len(formatter.drawables)
+
+    pytest.importorskip("cairosvg")
+    assert svg.rasterize(text, scale=2).height == 2 * int(root.get("height"))
+
+
+def test_aio():
+    import asyncio
+    from fairyimage.conversion import aio
+
+    async def _main():
+        async with aio.AsyncConverter(max_workers=2) as converter:
+            return await asyncio.gather(*(converter.make_str(s) for s in ["a", "b", "c"]))
+
+    images = asyncio.run(_main())
+    assert len(images) == 3
+    assert all(isinstance(elem, Image.Image) for elem in images)
+
+    # The default converter is used from successive loops, and is not shut down by `async with`.
+    async def _default():
+        async with aio.get_converter() as converter:
+            image = await converter.make_str("a")
+        return converter._tex_semaphore(), image
+
+    first, _ = asyncio.run(_default())
+    second, image = asyncio.run(_default())
+    assert first is not second
+    assert isinstance(image, Image.Image)
+
+
 def test_win_font_controller():
     availables = WinFontCollector.get_availables()
     assert isinstance(availables, list)
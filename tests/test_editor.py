@@ -17,6 +17,13 @@ def test_frame():
     ret_image = fi.frame(image, inner=False, width=5)
     assert ret_image.size == (image.size[0] + 10, image.size[1] + 10)
 
+    # Stacked arrays and `ImageArray` are framed at once.
+    stacked = np.random.uniform(0, 255, size=(5, 32, 24, 4)).astype(np.uint8)
+    assert fi.frame(stacked, inner=False, width=2).shape == (5, 36, 28, 4)
+    images = fi.ImageArray([image] * 6).reshape((2, 3))
+    assert fi.frame(images, width=2).shape == (2, 3)
+    assert fi.frame(images, width=0).shape == (2, 3)
+
 def test_equalize():
     """`fairyimage.equlize`'s test.
     Escecially, it focuses on the size of `images`, when `axis` and `mode` is specified. 
@@ -67,5 +74,42 @@ def test_trim():
     assert image.size == (24, 32)
 
 
+def test_put():
+    """`put` and `put_all`'s test.
+    Focus on the positions of `front` images.
+    """
+    back = Image.new("RGBA", size=(40, 30), color=(255, 255, 255, 255))
+    front = Image.new("RGBA", size=(10, 10), color=(255, 0, 0, 255))
+
+    ret = fi.put(front, back, align=("start", "end"))
+    assert ret.getpixel((0, 29)) == (255, 0, 0, 255)
+    assert back.getpixel((0, 29)) == (255, 255, 255, 255)
+
+    ret = fi.put(front, back, position=(5, 5), inplace=True)
+    assert ret is back and back.getpixel((5, 5)) == (255, 0, 0, 255)
+
+    back = Image.new("RGBA", size=(40, 30), color=(255, 255, 255, 255))
+    half = Image.new("RGBA", size=(10, 10), color=(0, 0, 255, 128))
+    items = [(front, (-5, -5)), (front, "center"), (half, (35, 25)), (front, (100, 100))]
+    ret = fi.put_all(items, back)
+    assert ret.size == back.size
+    assert ret.getpixel((0, 0)) == (255, 0, 0, 255)
+    assert ret.getpixel((20, 15)) == (255, 0, 0, 255)
+    assert ret.getpixel((39, 29))[:3] == (127, 127, 255)
+    assert back.getpixel((0, 0)) == (255, 255, 255, 255)
+
+
+def test_make_strs():
+    """`make_strs` renders multiple strings at once."""
+    from fairyimage.editor import make_strs
+    images = make_strs(["Fox", "Werewolf", "Villager"], fontsize=24)
+    assert len(images) == 3
+    assert all(image.mode == "RGBA" for image in images)
+    assert images[0].size[0] < images[1].size[0]
+    # The labels are identical to those of `make_str`.
+    for s, image in zip(["Fox", "Werewolf", "Villager"], images):
+        assert np.array_equal(np.asarray(image), np.asarray(fi.make_str(s, fontsize=24)))
+
+
 if __name__ == "__main__":
     pytest.main(["--capture=no"])
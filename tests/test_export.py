@@ -0,0 +1,57 @@
+import io
+import pytest
+import numpy as np
+from PIL import Image, ImageDraw
+import fairyimage as fi
+from fairyimage import export
+
+
+def _gen_image(size=(120, 700)):
+    rng = np.random.default_rng(0)
+    array = rng.integers(0, 32, size=(size[1], size[0], 3)).astype(np.uint8)
+    return Image.fromarray(array)
+
+
+def test_save(tmp_path):
+    """The pixels are kept by every preset and filter, and also in parallel strips."""
+    image = _gen_image()
+    for preset in ["fast", "balanced", "small"]:
+        path = tmp_path / f"{preset}.png"
+        export.save(image, path, preset=preset)
+        with Image.open(path) as result:
+            assert np.array_equal(np.asarray(result.convert("RGB")), np.asarray(image))
+    for filter in ["none", "sub", "up"]:
+        data = export.encode(image, filter=filter, workers=3, compress_level=1)
+        assert np.array_equal(np.asarray(Image.open(io.BytesIO(data))), np.asarray(image))
+
+    # `ImageArray` is composed, and lossy formats are also accepted.
+    images = fi.ImageArray([image, image])
+    export.save(images, tmp_path / "array.webp", quality=50)
+    with Image.open(tmp_path / "array.webp") as result:
+        assert result.size == images.image.size
+    assert Image.open(io.BytesIO(export.encode(image.convert("RGBA"), format="jpg"))).mode == "RGB"
+
+    with pytest.raises(ValueError):
+        export.save(image, tmp_path / "out.unknown")
+
+
+def test_quantize():
+    """Images of few colors become palette images without loss."""
+    image = Image.new("RGBA", (200, 100), (255, 255, 255, 0))
+    draw = ImageDraw.Draw(image)
+    draw.text((10, 10), "def func(x):", fill=(200, 0, 0, 255))
+    draw.rectangle((50, 50, 150, 90), fill=(0, 0, 255, 128))
+    data = export.encode(image, quantize=True)
+    result = Image.open(io.BytesIO(data))
+    assert result.mode == "P"
+    assert np.array_equal(np.asarray(result.convert("RGBA")), np.asarray(image))
+    assert len(data) < len(export.encode(image, quantize=False))
+
+    # Photos are kept unless the number of colors is specified.
+    photo = _gen_image()
+    assert Image.open(io.BytesIO(export.encode(photo, quantize=True))).mode == "RGB"
+    assert Image.open(io.BytesIO(export.encode(photo, quantize=16))).mode == "P"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "--capture=no"])
@@ -89,6 +89,174 @@ def test_grid():
     image = images.grid(color=(255, 0, 0), width=4)
     assert isinstance(image, Image.Image)
 
-    
+
+def test_grid_2d():
+    """The grid of 2-D `ImageArray` is drawn on one canvas of the narrowest mode."""
+    images = _gen_images(size=(32, 32), count=6 * 6)
+    images = fi.ImageArray(images).reshape((6, 6))
+    image = images.grid(color=(255, 0, 0), width=4)
+    assert image.size == images.grid_size(width=4) == (6 * 36 + 4, 6 * 36 + 4)
+    assert image.mode == "RGB"
+    assert image.getpixel((1, 1)) == (255, 0, 0)
+    box = images.tile_box((0, 0), grid_width=4)
+    assert image.getpixel(box[:2]) == (0, 0, 0)
+    assert image.getpixel((box[0] - 1, box[1])) == (255, 0, 0)
+
+    # The narrowest mode is used.
+    images = fi.ImageArray([Image.new("L", size=(8, 8))] * 4).reshape((2, 2))
+    assert images.image.mode == "L"
+    assert images.grid(color=(128, 128, 128), width=2).mode == "L"
+    assert images.grid(color=(255, 0, 0, 128), width=2).mode == "RGBA"
+
+
+def test_setitem():
+    """Replacing a tile repaints only its region.
+    """
+    images = _gen_images(size=(32, 32), count=6 * 6)
+    images = fi.ImageArray(images).reshape((6, 6))
+    image = images.image
+
+    images[1, 2] = Image.new(mode="RGB", size=(16, 16), color=(255, 0, 0))
+    assert images.pop_dirty() == [(64, 32, 96, 64)]
+    assert images.image is image
+    assert image.getpixel((70, 40)) == (255, 0, 0)
+    assert image.getpixel((20, 40)) == (0, 0, 0)
+    assert images.dirty_boxes == []
+
+
+def test_unique():
+    """Identical tiles are processed once and shared."""
+    blanks = _gen_images(size=(64, 64), count=8)
+    red = Image.new(mode="RGB", size=(64, 64), color=(255, 0, 0))
+    images = fi.ImageArray([*blanks, red]).reshape((3, 3))
+    tiles = images.tiles
+    assert all(tile is tiles[0] for tile in tiles[:8])
+    assert tiles[8] is not tiles[0]
+
+    calls = []
+    images.map(lambda image: calls.append(image) or image)
+    assert len(calls) == 2
+
+    filled = fi.ImageArray(blanks[:5]).reshape((2, 4), fill=True).tiles
+    assert filled[5] is filled[7]
+
+    # `P` tiles which differ only in the transparency are not unified.
+    opaque = Image.new(mode="P", size=(8, 8), color=0)
+    transparent = opaque.copy()
+    transparent.info["transparency"] = 0
+    assert fi.image_array.unique_tiles([opaque, transparent])[1] == [0, 1]
+    tiles = fi.ImageArray([opaque, transparent]).tiles
+    assert "transparency" not in tiles[0].info and tiles[1].info["transparency"] == 0
+
+
+def test_getitem():
+    """Indexing returns tiles or views sharing them."""
+    colors = [(index, 0, 0) for index in range(6 * 6)]
+    tiles = [Image.new(mode="RGB", size=(8, 8), color=color) for color in colors]
+    images = fi.ImageArray(tiles).reshape((6, 6))
+
+    assert images[1, 2].getpixel((0, 0)) == (8, 0, 0)
+    view = images[1:3, ::2]
+    assert isinstance(view, fi.ImageArray)
+    assert view.shape == (2, 3)
+    assert view[1, 1] is images[2, 2]
+    assert images[images.shape[0] - 1].shape == (6,)
+    assert images[[0, 5]].shape == (2, 6)
+    mask = np.zeros((6, 6), dtype=bool)
+    mask[0, :3] = True
+    assert images[mask].shape == (3,)
+    with pytest.raises(IndexError):
+        images[6, 0]
+
+    # Assignment of one image or images.
+    images.image
+    red = Image.new(mode="RGB", size=(4, 4), color=(255, 0, 0))
+    images[0, :] = red
+    assert images[0, 5].size == (8, 8)
+    assert images.image.getpixel((45, 0)) == (255, 0, 0)
+    images[1:3, 0] = [red, red]
+    assert images[2, 0] is images[1, 0]
+    # Assignment via views is also reflected.
+    view[0, 0] = Image.new(mode="RGB", size=(8, 8), color=(0, 255, 0))
+    assert images.image.getpixel((0, 8)) == (0, 255, 0)
+
+    # The composed image is widened for the tiles of the wider mode.
+    gray = fi.ImageArray([Image.new(mode="L", size=(8, 8), color=0)] * 2)
+    assert gray.image.mode == "L"
+    gray[1, 0] = red
+    assert gray.image.mode == "RGB" and gray.image.getpixel((0, 8)) == (255, 0, 0)
+    assert gray.image.getpixel((0, 0)) == (0, 0, 0)
+
+
+def test_attributes():
+    """Attributes are resolved without composing the image."""
+    tiles = [Image.new(mode="RGB", size=(32, 16), color=(0, index, 0)) for index in range(6)]
+    images = fi.ImageArray(tiles).reshape((2, 3))
+    assert images.ndim == 2
+    assert images.size == (96, 32) and images.width == 96 and images.height == 32
+    assert images.mode == "RGB"
+    assert images._composite is None
+    with pytest.raises(AttributeError):
+        images.no_such_attribute
+
+    assert images.getpixel((0, 0)) == (0, 0, 0)
+    assert images._composite is not None
+    images.tiles[0].paste((255, 0, 0), (0, 0, 32, 16))
+    images.invalidate()
+    assert images.getpixel((0, 0)) == (255, 0, 0)
+
+    # `mode` reflects the assigned tiles before they are painted.
+    gray = fi.ImageArray([Image.new(mode="L", size=(8, 8))] * 2)
+    gray.image
+    gray[1, 0] = Image.new(mode="RGB", size=(8, 8), color=(255, 0, 0))
+    assert gray.mode == "RGB" and gray.image.mode == "RGB"
+
+
+def test_sources(tmp_path):
+    """Paths and file objects are accepted as images.
+    """
+    import io
+    paths = []
+    for index in range(3):
+        path = tmp_path / f"{index}.jpg"
+        Image.new(mode="RGB", size=(640, 480), color=(index, 0, 0)).save(path)
+        paths.append(path)
+    buf = io.BytesIO()
+    Image.new(mode="RGB", size=(320, 240), color=0).save(buf, format="JPEG")
+    buf.seek(0)
+
+    images = fi.ImageArray([*paths, buf])
+    assert images.count == 4
+    assert images.unit_size == (640, 480)
+
+    image = fi.thumbnail([str(path) for path in paths])
+    assert isinstance(image, Image.Image)
+
+
+def test_open_image(tmp_path, monkeypatch):
+    """`JPEG` is decoded at the reduced scale, not at the full size."""
+    from fairyimage import loader
+    path = tmp_path / "large.jpg"
+    Image.new(mode="RGB", size=(1600, 1200), color=(255, 0, 0)).save(path)
+
+    decoded = []
+    original = loader.shrink
+    monkeypatch.setattr(loader, "shrink", lambda image, size: decoded.append(image.size) or original(image, size))
+
+    # 1/8 scale matches the target, so no resize is required.
+    image = loader.open_image(path, (200, 150))
+    assert image.size == (200, 150)
+    assert decoded == []
+
+    # 1/4 scale is the smallest one larger than the target.
+    image = loader.open_image(path, (300, 200))
+    assert image.size == (300, 200)
+    assert decoded == [(400, 300)]
+
+    # Without `size`, the full size is decoded.
+    assert loader.open_image(path).size == (1600, 1200)
+
+
+
 if __name__ == "__main__":
     pytest.main(["--capture=no"])
@@ -0,0 +1,45 @@
+import pytest
+from PIL import Image
+import fairyimage as fi
+from fairyimage.layout import plan_layout, plan_shape
+
+
+def _gen_images(size=(32, 32), count=16):
+    return [Image.new(mode="RGB", size=size, color=0) for _ in range(count)]
+
+
+def test_plan_layout():
+    """`Layout` is determined only from the sizes,
+    and it is applicable to multiple batches.
+    """
+    sizes = [(32, 32)] * 12
+    layout = plan_layout(sizes)
+    assert layout.unit_size == (32, 32)
+    assert layout.shape[0] * layout.shape[1] == 12
+
+    for _ in range(2):
+        array = layout.apply(_gen_images(size=(32, 32), count=12))
+        assert array.shape == layout.shape
+        assert array.image.size == layout.size
+
+    with pytest.raises(ValueError):
+        layout.apply(_gen_images(count=11))
+
+
+def test_fill():
+    """Non-divisor shapes are considered when `fill` is True.
+    """
+    assert plan_shape(7, (32, 32), fill=False) in {(1, 7), (7, 1)}
+    assert plan_shape(7, (32, 32), fill=True) == (3, 3)
+
+    layout = plan_layout([(32, 32)] * 7, shape=(2, -1), fill=True)
+    assert layout.shape == (2, 4)
+    assert layout.n_fill == 1
+    assert layout.apply(_gen_images(count=7)).shape == (2, 4)
+
+    image = fi.thumbnail(_gen_images(count=7), fill=True)
+    assert image.size == (96, 96)
+
+
+if __name__ == "__main__":
+    pytest.main(["--capture=no"])
@@ -1,6 +1,7 @@
 import pytest
 from PIL import Image
 from fairyimage import vstack, hstack, resize
+from fairyimage.operations import resize_many, shrink
 import numpy as np
 
 
@@ -36,6 +37,27 @@ def test_concatenation():
     assert hstack((image1, image2), align="end").mode == "RGBA"
 
 
+def test_concatenation_mode():
+    """The narrowest common mode is used for the result."""
+    gray1 = Image.new("L", size=(24, 32), color=10)
+    gray2 = Image.new("1", size=(20, 22), color=1)
+    ret = vstack((gray1, gray2), align="center")
+    assert ret.mode == "L"
+    assert ret.size == (24, 54)
+    assert ret.getpixel((0, 40)) == 255
+
+    rgb = Image.new("RGB", size=(24, 32))
+    assert hstack((gray1, rgb)).mode == "RGB"
+    assert hstack((gray1, Image.new("LA", size=(3, 3)))).mode == "LA"
+    assert hstack((rgb, Image.new("LA", size=(3, 3)))).mode == "RGBA"
+    assert hstack((gray1, rgb), mode="RGBA").mode == "RGBA"
+
+    palette = rgb.convert("P", palette=Image.Palette.ADAPTIVE)
+    ret = hstack((palette, palette.resize((10, 10))))
+    assert ret.mode == "P"
+    assert ret.getpalette() == palette.getpalette()
+
+
 def test_resize():
     """Test related to `resize` operations."""
     image = Image.fromarray(
@@ -49,5 +71,33 @@ def test_resize():
     assert resize(image, width=40).size[0] == 40
 
 
+def test_resize_many():
+    """`resize_many` resizes the same image only once in a group."""
+    image1 = Image.fromarray(
+        np.random.uniform(0, 255, size=(320, 240, 3)).astype(np.uint8)
+    )
+    image2 = Image.new("RGB", size=(24, 32))
+    images = resize_many([image1, image1, image2], [(24, 32), (24, 32), (24, 32)])
+    assert all(image.size == (24, 32) for image in images)
+    assert images[0] is images[1]
+    assert images[2] is image2
+
+
+def test_shrink():
+    """`shrink` is close to `resize` with the full resampling."""
+    array = np.random.uniform(0, 255, size=(300, 400, 3)).astype(np.uint8)
+    image = Image.fromarray(array)
+    assert np.array_equal(np.asarray(shrink(image, (100, 75))), np.asarray(image.reduce(4)))
+
+    smooth = image.resize((40, 30)).resize((400, 300))
+    expected = np.asarray(smooth.resize((64, 48)), dtype=float)
+    actual = np.asarray(shrink(smooth, (64, 48)), dtype=float)
+    assert np.abs(expected - actual).mean() < 2
+
+    assert shrink(image, image.size) is not image
+    assert shrink(image, (800, 600)).size == (800, 600)
+    assert shrink(image.convert("RGBA"), (100, 75)).mode == "RGBA"
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "--capture=no"])
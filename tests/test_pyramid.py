@@ -0,0 +1,27 @@
+import pytest
+import numpy as np
+from PIL import Image
+import fairyimage as fi
+
+
+def test_write_dzi(tmp_path):
+    """The highest level is equal to `grid`, and the lowest is 1x1."""
+    colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255)] * 4
+    images = fi.ImageArray([Image.new("RGB", (50, 30), color) for color in colors]).reshape((3, 4))
+    path = fi.write_dzi(images, tmp_path / "mosaic", tile_size=64, grid_width=4)
+    assert path.suffix == ".dzi" and path.exists()
+
+    expected = images.grid(width=4)
+    width, height = expected.size
+    folder = tmp_path / "mosaic_files"
+    levels = sorted(int(p.name) for p in folder.iterdir())
+    assert levels == list(range(9))  # 2 ** 8 >= 220.
+    top = folder / "8"
+    assert len(list(top.iterdir())) == 4 * 2
+    tile = Image.open(top / "1_1.png")
+    assert np.array_equal(np.asarray(tile), np.asarray(expected.crop((64, 64, 128, height))))
+    assert Image.open(folder / "0" / "0_0.png").size == (1, 1)
+
+
+if __name__ == "__main__":
+    pytest.main(["--capture=no"])